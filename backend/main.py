@@ -1,10 +1,12 @@
-from fastapi import FastAPI, WebSocket, HTTPException, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import models
 import schemas
 from database import SessionLocal, engine
+from security import get_current_user
 from routers import users, chat, goals, wellness, community, finance, websocket, notification
 import os
 from dotenv import load_dotenv
@@ -15,7 +17,12 @@ from services.ultimate_ai import UltimateAI
 from services.enhanced_education_therapy_ai import EnhancedEducationTherapyAI
 from services.life_guide_ai import LifeGuideAI
 from services.creative_ai import CreativeAIService
+from services.chat_stream import ChatStreamService
+from .services.mail_transport import mail_transport
+from .services.notification_dispatcher import notification_dispatcher
+from .websocket_manager import manager
 from datetime import datetime
+import json
 
 load_dotenv()
 
@@ -70,6 +77,7 @@ app.include_router(websocket.router, tags=["websocket"])
 @app.on_event("startup")
 async def startup_event():
     """Initialize all systems on startup."""
+    notification_dispatcher.start()
     try:
         await system.initialize_ai_systems()
     except Exception as e:
@@ -78,6 +86,13 @@ async def startup_event():
             detail=f"Failed to initialize AI systems: {str(e)}"
         )
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background delivery, close pooled SMTP connections and stop pub/sub."""
+    await notification_dispatcher.stop()
+    await mail_transport.close()
+    await manager.close()
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -160,17 +175,49 @@ async def analyze_data(
 # WebSocket connection for real-time chat
 @app.websocket("/ws/chat/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    await websocket.accept()
+    """Stream chat replies over a websocket.
+
+    Authenticate with a ``token`` query parameter. Each incoming message is
+    plain text or JSON ``{"content": ..., "context": ...}``; the reply is sent
+    as ``token`` events followed by a ``done`` event with the saved message.
+    """
+    db = SessionLocal()
     try:
+        token = websocket.query_params.get("token") or \
+            websocket.headers.get("authorization", "").replace("Bearer ", "")
+        try:
+            user = await get_current_user(token, db)
+        except HTTPException:
+            await websocket.close(code=4001)
+            return
+        if user.id != user_id:
+            await websocket.close(code=4003)
+            return
+
+        await websocket.accept()
+        chat_stream = ChatStreamService(db)
         while True:
             data = await websocket.receive_text()
-            # Process the message and generate AI response
-            response = f"AI response to: {data}"
-            await websocket.send_text(response)
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                payload = {"content": data}
+
+            async for event in chat_stream.stream_reply(
+                user,
+                payload.get("content", ""),
+                payload.get("context")
+            ):
+                await websocket.send_json(jsonable_encoder(event))
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
-    finally:
         await websocket.close()
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -39,6 +39,11 @@ class RecurrenceInterval(str, Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "date", "id"),
+        Index("ix_transactions_user_type_date", "user_id", "type", "date", "id"),
+        Index("ix_transactions_user_category_date", "user_id", "category", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -57,8 +62,35 @@ class Transaction(Base):
 
     user = relationship("User", back_populates="transactions")
 
+class TransactionMonthlyRollup(Base):
+    """Per-user monthly totals, maintained incrementally on transaction writes."""
+    __tablename__ = "transaction_monthly_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "year", "month", "type", "category", name="uq_transaction_monthly_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    year = Column(Integer)
+    month = Column(Integer)
+    type = Column(Enum(TransactionType))
+    category = Column(Enum(TransactionCategory))
+    total = Column(Float, default=0)
+    count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class TransactionRollupState(Base):
+    """Marks users whose monthly rollup has been built from their full transaction history."""
+    __tablename__ = "transaction_rollup_states"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rebuilt_at = Column(DateTime, default=datetime.utcnow)
+
 class RecurringTransaction(Base):
     __tablename__ = "recurring_transactions"
+    __table_args__ = (
+        Index("ix_recurring_transactions_active_next_due", "is_active", "next_due", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -147,3 +179,21 @@ class FinancialSnapshot(Base):
     metrics = Column(JSON)  # Store additional financial metrics
 
     user = relationship("User", back_populates="financial_snapshots")
+
+class ReportJob(Base):
+    """A queued PDF report, shared by every worker; the PDF itself is stored on disk by id."""
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        Index("ix_report_jobs_user_cache_key", "user_id", "cache_key"),
+    )
+
+    id = Column(String, primary_key=True)  # uuid hex
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    cache_key = Column(String)  # hash of sections, date range and data version
+    sections = Column(JSON)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    status = Column(String, default="pending")  # pending, running, completed or failed
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -11,6 +11,13 @@ class NotificationType(str, PyEnum):
     BUDGET_ALERT = "budget_alert"
     SAVINGS_GOAL = "savings_goal"
     FINANCIAL_HEALTH = "financial_health"
+    WEEKLY_SUMMARY = "weekly_summary"
+    MONTHLY_REPORT = "monthly_report"
+    GENERAL = "general"
+    BILL_REMINDER = "bill_reminder"
+    SAVINGS_MILESTONE = "savings_milestone"
+    INVESTMENT_ALERT = "investment_alert"
+    SECURITY_ALERT = "security_alert"
 
 class NotificationPriority(str, PyEnum):
     LOW = "low"
@@ -22,6 +29,17 @@ class NotificationStatus(str, PyEnum):
     READ = "read"
     ARCHIVED = "archived"
 
+class DeliveryChannel(str, PyEnum):
+    WEBSOCKET = "websocket"
+    EMAIL = "email"
+    PUSH = "push"
+
+class DeliveryStatus(str, PyEnum):
+    PENDING = "pending"
+    SENDING = "sending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -39,6 +57,29 @@ class Notification(Base):
 
     # Relationships
     user = relationship("User", back_populates="notifications")
+    deliveries = relationship("NotificationDelivery", back_populates="notification", cascade="all, delete-orphan")
+
+class NotificationDelivery(Base):
+    """Outbox row for delivering a notification on one channel."""
+    __tablename__ = "notification_deliveries"
+    __table_args__ = (
+        Index("ix_notification_deliveries_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), index=True)
+    channel = Column(Enum(DeliveryChannel))
+    status = Column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING)
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+    latency_ms = Column(Float, nullable=True)  # From creation to delivery
+
+    # Relationships
+    notification = relationship("Notification", back_populates="deliveries")
 
 class NotificationPreference(Base):
     __tablename__ = "notification_preferences"
@@ -53,3 +94,18 @@ class NotificationPreference(Base):
 
     # Relationships
     user = relationship("User", back_populates="notification_preferences")
+
+class EmailDelivery(Base):
+    """Progress of one user's email in a scheduled send, so an interrupted run can resume."""
+    __tablename__ = "email_deliveries"
+    __table_args__ = (
+        UniqueConstraint("run_key", "user_id", name="uq_email_delivery_run_user"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_key = Column(String, index=True)  # e.g. "weekly_summary:2024-W07"
+    user_id = Column(Integer, ForeignKey("users.id"))
+    status = Column(String)  # sent or failed
+    attempts = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
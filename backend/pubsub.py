@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set
+import redis.asyncio as aioredis
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "broadcast"
+
+Handler = Callable[[str, str], None]
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
+
+class PubSub(ABC):
+    """Delivers serialized messages published on named channels.
+
+    A worker calls ``start`` with a handler, then ``subscribe`` to the channels
+    it has local recipients for; ``publish`` from any worker reaches every
+    worker subscribed to the channel. Every backend subscribes to the broadcast
+    channel on start.
+    """
+
+    @abstractmethod
+    async def start(self, handler: Handler) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str) -> None:
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> None:
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+class InProcessPubSub(PubSub):
+    """Single-worker backend: publishing hands the message straight to the local handler."""
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler) -> None:
+        self.handler = handler
+
+    async def publish(self, channel: str, data: str) -> None:
+        if self.handler:
+            self.handler(channel, data)
+
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    async def unsubscribe(self, channel: str) -> None:
+        pass
+
+class LocalBroker:
+    """In-memory stand-in for Redis that several ``LocalPubSub`` instances share.
+
+    Lets tests run multiple connection managers in one process as if they were
+    separate workers.
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["LocalPubSub"]] = {}
+
+class LocalPubSub(PubSub):
+    def __init__(self, broker: LocalBroker):
+        self.broker = broker
+        self.handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler) -> None:
+        self.handler = handler
+        await self.subscribe(BROADCAST_CHANNEL)
+
+    async def publish(self, channel: str, data: str) -> None:
+        for subscriber in list(self.broker.subscribers.get(channel, ())):
+            if subscriber.handler:
+                subscriber.handler(channel, data)
+
+    async def subscribe(self, channel: str) -> None:
+        self.broker.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel: str) -> None:
+        subscribers = self.broker.subscribers.get(channel)
+        if subscribers:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.broker.subscribers[channel]
+
+    async def close(self) -> None:
+        for channel in list(self.broker.subscribers):
+            await self.unsubscribe(channel)
+
+class RedisPubSub(PubSub):
+    """Redis backend so any worker can reach sockets held by another."""
+
+    def __init__(self, url: str, prefix: str = "ws:"):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.pubsub = self.redis.pubsub()
+        self.prefix = prefix
+        self.handler: Optional[Handler] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler) -> None:
+        self.handler = handler
+        await self.subscribe(BROADCAST_CHANNEL)
+        self.task = asyncio.create_task(self._listen())
+
+    async def publish(self, channel: str, data: str) -> None:
+        await self.redis.publish(self.prefix + channel, data)
+
+    async def subscribe(self, channel: str) -> None:
+        await self.pubsub.subscribe(self.prefix + channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self.pubsub.unsubscribe(self.prefix + channel)
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+        await self.pubsub.close()
+        await self.redis.close()
+
+    async def _listen(self) -> None:
+        """Hand incoming messages to the handler, reconnecting after errors."""
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message["type"] == "message":
+                        self.handler(message["channel"][len(self.prefix):], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis pub/sub listener error: {str(e)}")
+                await asyncio.sleep(1)
+
+def create_pubsub() -> PubSub:
+    """Use Redis when REDIS_URL is configured, otherwise deliver in-process."""
+    url = os.getenv("REDIS_URL")
+    if url:
+        return RedisPubSub(url)
+    return InProcessPubSub()
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 import models
 import schemas
 from database import get_db
 from security import get_current_user
-import openai
+from services.llm_cache import llm_cache
+from services.chat_stream import ChatStreamService, format_sse
+from services.chat_prompt import (
+    ChatPromptAssembler, get_chat_client, with_history_summary, CHAT_MODEL, CHAT_MAX_TOKENS
+)
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -19,6 +24,13 @@ async def send_message(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    # Build the prompt from recent history before this message is stored
+    assembler = ChatPromptAssembler(db)
+    messages, summary = await assembler.assemble(
+        current_user,
+        message.content
+    )
+
     # Save user message
     db_message = models.ChatMessage(
         user_id=current_user.id,
@@ -30,37 +42,62 @@ async def send_message(
     db.commit()
 
     try:
-        # Generate AI response using OpenAI
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"You are a supportive AI assistant helping {current_user.full_name}. "
-                              f"User age: {current_user.age}, Gender: {current_user.gender}"
-                },
-                {"role": "user", "content": message.content}
-            ],
-            max_tokens=150
+        # Generate AI response with the shared async client used for
+        # streaming. Repeated questions with the same context are answered
+        # from the response cache
+        ai_response = await llm_cache.complete(
+            get_chat_client().chat.completions.create,
+            model=CHAT_MODEL,
+            messages=messages,
+            context=message.context,
+            max_tokens=CHAT_MAX_TOKENS
         )
 
-        ai_response = response.choices[0].message.content
-
         # Save AI response
         ai_message = models.ChatMessage(
             user_id=current_user.id,
             content=ai_response,
             is_ai=True,
-            context=message.context
+            context=with_history_summary(message.context, summary)
         )
         db.add(ai_message)
         db.commit()
         db.refresh(ai_message)
+        assembler.schedule_fold(current_user.id)
         return ai_message
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/message/stream")
+async def stream_message(
+    message: schemas.ChatMessageCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream the AI reply as Server-Sent Events.
+
+    Emits ``token`` events as the completion arrives, then a ``done`` event with
+    the saved message (or an ``error`` event if generation fails).
+    """
+    events = ChatStreamService(db).stream_reply(
+        current_user,
+        message.content,
+        message.context
+    )
+
+    async def body():
+        async for event in events:
+            yield format_sse(event)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/history", response_model=List[schemas.ChatMessageResponse])
 async def get_chat_history(
     limit: int = 50,
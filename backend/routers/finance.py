@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -10,14 +10,26 @@ from ..schemas.finance import (
     SavingsGoalCreate, SavingsGoal as SavingsGoalSchema,
     SavingsContributionCreate, SavingsContribution as SavingsContributionSchema,
     FinancialSnapshotCreate, FinancialSnapshot as FinancialSnapshotSchema,
-    MonthlyTotal, CategoryTotal, BudgetProgress, FinancialSummary
+    BudgetProgress, FinancialSummary, TransactionPage,
+    ReportJobCreate, ReportJob as ReportJobSchema
 )
 from ..auth import get_current_user
-from sqlalchemy import func, extract
-from ..websocket_manager import manager
+from sqlalchemy import and_, or_
+from ..services.finance_events import finance_events
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from io import BytesIO
+import json
+import os
 from ..report_generator import ReportGenerator
 from ..services.recurring_transactions import RecurringTransactionService
+from ..services.financial_summary import FinancialSummaryService
+from ..services.budget_progress import BudgetProgressService
+from ..services.transaction_rollup import TransactionRollupService
+from ..services.transaction_export import TransactionExporter
+from ..services.transaction_import import TransactionImporter
+from ..services.report_jobs import report_jobs
+from ..utils.pagination import encode_cursor, decode_cursor
 from ..schemas.recurring_transactions import (
     RecurringTransactionCreate, RecurringTransaction, RecurringTransactionUpdate
 )
@@ -33,20 +45,123 @@ async def create_transaction(
 ):
     db_transaction = Transaction(**transaction.dict(), user_id=current_user.id)
     db.add(db_transaction)
+    TransactionRollupService(db).record_transaction(db_transaction)
     db.commit()
     db.refresh(db_transaction)
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "transaction_created",
-            "data": TransactionSchema.from_orm(db_transaction).dict()
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "transaction",
+        "created",
+        TransactionSchema.from_orm(db_transaction).dict()
     )
     
     return db_transaction
 
+TRANSACTION_IMPORT_MAX_ROWS = int(os.getenv("TRANSACTION_IMPORT_MAX_ROWS", 100000))
+TRANSACTION_IMPORT_MAX_BYTES = int(os.getenv("TRANSACTION_IMPORT_MAX_BYTES", 50 * 1024 * 1024))
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Imports are limited to {TRANSACTION_IMPORT_MAX_BYTES} bytes"
+    )
+
+async def _read_import_body(request: Request) -> bytes:
+    """Read the request body, stopping as soon as it passes the size limit."""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > TRANSACTION_IMPORT_MAX_BYTES:
+            raise _too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@router.post("/transactions/bulk")
+async def create_transactions_bulk(
+    request: Request,
+    strict: bool = False,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Import many transactions at once.
+
+    Accepts a JSON array body, a CSV or NDJSON body (``text/csv`` or
+    ``application/x-ndjson``), or a multipart upload in a ``file`` field. Valid
+    rows are inserted in one database transaction; invalid rows are returned
+    with their position and field errors. With ``strict`` nothing is inserted
+    when any row is invalid.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    importer = TransactionImporter(db, current_user.id)
+
+    # Reject declared oversize bodies before reading any of them
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > TRANSACTION_IMPORT_MAX_BYTES:
+        raise _too_large()
+
+    try:
+        if content_type == "application/json":
+            frame = importer.parse_records(json.loads(await _read_import_body(request)))
+        elif content_type == "multipart/form-data":
+            upload = (await request.form()).get("file")
+            if upload is None or not hasattr(upload, "read"):
+                raise HTTPException(status_code=400, detail="Upload the rows in a 'file' field")
+            # The form parser spools files to disk, so only the read is capped
+            content = await upload.read(TRANSACTION_IMPORT_MAX_BYTES + 1)
+            if len(content) > TRANSACTION_IMPORT_MAX_BYTES:
+                raise _too_large()
+            if (upload.filename or "").lower().endswith((".ndjson", ".jsonl")):
+                frame = importer.parse_ndjson(content)
+            else:
+                frame = importer.parse_csv(content)
+        elif content_type == "text/csv":
+            frame = importer.parse_csv(await _read_import_body(request))
+        elif content_type in ("application/x-ndjson", "application/jsonl"):
+            frame = importer.parse_ndjson(await _read_import_body(request))
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse transactions: {str(e)}")
+
+    if len(frame) > TRANSACTION_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {TRANSACTION_IMPORT_MAX_ROWS} transactions can be imported at once"
+        )
+
+    result = await run_in_threadpool(importer.import_frame, frame, strict)
+
+    # One notification for the whole import rather than one per row
+    if result['inserted']:
+        finance_events.record(
+            current_user.id,
+            "transactions",
+            "imported",
+            {"count": result['inserted']}
+        )
+
+    return result
+
+def _filter_transactions(
+    query,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    category: Optional[str],
+    type: Optional[str]
+):
+    if start_date:
+        query = query.filter(Transaction.date >= start_date)
+    if end_date:
+        query = query.filter(Transaction.date <= end_date)
+    if category:
+        query = query.filter(Transaction.category == category)
+    if type:
+        query = query.filter(Transaction.type == type)
+    return query
+
 @router.get("/transactions/", response_model=List[TransactionSchema])
 def get_transactions(
     skip: int = 0,
@@ -59,17 +174,54 @@ def get_transactions(
     current_user = Depends(get_current_user)
 ):
     query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    query = _filter_transactions(query, start_date, end_date, category, type)
     
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    if category:
-        query = query.filter(Transaction.category == category)
-    if type:
-        query = query.filter(Transaction.type == type)
-    
-    return query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc()).offset(skip).limit(limit).all()
+
+@router.get("/transactions/page", response_model=TransactionPage)
+def get_transactions_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """List transactions newest first using keyset pagination on (date, id).
+
+    Transactions without a date come last, ordered by id.
+    """
+    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    query = _filter_transactions(query, start_date, end_date, category, type)
+
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor_date is None:
+            query = query.filter(Transaction.date.is_(None), Transaction.id < cursor_id)
+        else:
+            query = query.filter(or_(
+                Transaction.date < cursor_date,
+                and_(Transaction.date == cursor_date, Transaction.id < cursor_id),
+                Transaction.date.is_(None)
+            ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(
+        Transaction.date.desc().nullslast(),
+        Transaction.id.desc()
+    ).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+
+    return TransactionPage(items=items, next_cursor=next_cursor)
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionSchema)
 def get_transaction(
@@ -99,19 +251,22 @@ async def update_transaction(
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    rollup_service = TransactionRollupService(db)
+    previous = rollup_service.snapshot(db_transaction)
+
     for key, value in transaction_update.dict().items():
         setattr(db_transaction, key, value)
     
+    rollup_service.record_update(previous, db_transaction)
     db.commit()
     db.refresh(db_transaction)
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "transaction_updated",
-            "data": TransactionSchema.from_orm(db_transaction).dict()
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "transaction",
+        "updated",
+        TransactionSchema.from_orm(db_transaction).dict()
     )
     
     return db_transaction
@@ -129,16 +284,16 @@ async def delete_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    TransactionRollupService(db).record_transaction(transaction, sign=-1)
     db.delete(transaction)
     db.commit()
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "transaction_deleted",
-            "data": {"id": transaction_id}
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "transaction",
+        "deleted",
+        entity_id=transaction_id
     )
     
     return {"message": "Transaction deleted"}
@@ -156,12 +311,11 @@ async def create_budget(
     db.refresh(db_budget)
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "budget_created",
-            "data": BudgetSchema.from_orm(db_budget).dict()
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "budget",
+        "created",
+        BudgetSchema.from_orm(db_budget).dict()
     )
     
     return db_budget
@@ -185,41 +339,11 @@ def get_budget_progress(
     if not year:
         year = datetime.now().year
 
-    budgets = db.query(Budget).filter(
-        Budget.user_id == current_user.id,
-        Budget.start_date <= datetime(year, month, 1),
-        Budget.end_date >= datetime(year, month + 1, 1) - timedelta(days=1)
-    ).all()
-
-    progress = []
-    for budget in budgets:
-        spent = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.category == budget.category,
-            Transaction.type == "expense",
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
-        ).scalar() or 0
-
-        remaining = budget.amount - spent
-        percentage = (spent / budget.amount) * 100 if budget.amount > 0 else 0
-        
-        status = "on_track"
-        if percentage >= 100:
-            status = "exceeded"
-        elif percentage >= budget.alert_threshold * 100:
-            status = "warning"
-
-        progress.append(BudgetProgress(
-            category=budget.category,
-            budget_amount=budget.amount,
-            spent_amount=spent,
-            remaining_amount=remaining,
-            percentage_used=percentage,
-            status=status
-        ))
-
-    return progress
+    progress = BudgetProgressService(db).get_progress(
+        current_user.id,
+        datetime(year, month, 1)
+    )
+    return [BudgetProgress(**item) for item in progress]
 
 # Savings Goals endpoints
 @router.post("/savings-goals/", response_model=SavingsGoalSchema)
@@ -234,12 +358,11 @@ async def create_savings_goal(
     db.refresh(db_goal)
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "savings_goal_created",
-            "data": SavingsGoalSchema.from_orm(db_goal).dict()
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "savings_goal",
+        "created",
+        SavingsGoalSchema.from_orm(db_goal).dict()
     )
     
     return db_goal
@@ -275,15 +398,17 @@ async def add_contribution(
     db.refresh(db_contribution)
     
     # Notify via WebSocket
-    await manager.send_personal_message(
-        {
-            "type": "contribution_added",
-            "data": {
-                "contribution": SavingsContributionSchema.from_orm(db_contribution).dict(),
-                "goal": SavingsGoalSchema.from_orm(goal).dict()
-            }
-        },
-        str(current_user.id)
+    finance_events.record(
+        current_user.id,
+        "savings_contribution",
+        "created",
+        SavingsContributionSchema.from_orm(db_contribution).dict()
+    )
+    finance_events.record(
+        current_user.id,
+        "savings_goal",
+        "updated",
+        SavingsGoalSchema.from_orm(goal).dict()
     )
     
     return db_contribution
@@ -296,7 +421,7 @@ async def create_recurring_transaction(
     current_user = Depends(get_current_user)
 ):
     recurring_service = RecurringTransactionService(db)
-    return recurring_service.create_recurring_transaction(current_user.id, transaction)
+    return await recurring_service.create_recurring_transaction(current_user.id, transaction)
 
 @router.get("/recurring-transactions", response_model=List[schemas.RecurringTransaction])
 async def get_recurring_transactions(
@@ -343,8 +468,13 @@ async def process_recurring_transactions(
 ):
     """Process all due recurring transactions. This endpoint should be called by a scheduled task."""
     recurring_service = RecurringTransactionService(db)
-    recurring_service.process_due_transactions()
-    return {"status": "success"}
+    generated = await run_in_threadpool(recurring_service.process_due_transactions)
+    await recurring_service.notify_generated(generated)
+    return {
+        "status": "success",
+        "users": len(generated),
+        "transactions": sum(item['occurrences'] for items in generated.values() for item in items)
+    }
 
 # Financial Summary endpoints
 @router.get("/summary", response_model=FinancialSummary)
@@ -359,102 +489,44 @@ def get_financial_summary(
     if not end_date:
         end_date = datetime.now()
 
-    # Calculate totals
-    income = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "income",
-        Transaction.date.between(start_date, end_date)
-    ).scalar() or 0
-
-    expenses = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.date.between(start_date, end_date)
-    ).scalar() or 0
+    summary = FinancialSummaryService(db).get_summary(
+        current_user.id,
+        start_date,
+        end_date
+    )
 
     # Get latest financial snapshot
     snapshot = db.query(FinancialSnapshot).filter(
         FinancialSnapshot.user_id == current_user.id
     ).order_by(FinancialSnapshot.date.desc()).first()
 
-    # Calculate monthly totals
-    monthly_totals = []
-    current_date = start_date
-    while current_date <= end_date:
-        month_start = datetime(current_date.year, current_date.month, 1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-        month_income = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "income",
-            Transaction.date.between(month_start, month_end)
-        ).scalar() or 0
-
-        month_expenses = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.date.between(month_start, month_end)
-        ).scalar() or 0
-
-        monthly_totals.append(MonthlyTotal(
-            month=month_start,
-            income=month_income,
-            expenses=month_expenses,
-            savings=month_income - month_expenses,
-            net=month_income - month_expenses
-        ))
-
-        current_date = (month_start + timedelta(days=32)).replace(day=1)
-
-    # Get category totals
-    category_totals = []
-    total_amount = expenses  # Use expenses for percentage calculation
-    categories = db.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('amount'),
-        func.count(Transaction.id).label('count')
-    ).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.date.between(start_date, end_date)
-    ).group_by(Transaction.category).all()
-
-    for category in categories:
-        category_totals.append(CategoryTotal(
-            category=category.category,
-            amount=category.amount,
-            percentage=(category.amount / total_amount * 100) if total_amount > 0 else 0,
-            transaction_count=category.count
-        ))
-
     # Get budget progress
-    budget_progress = get_budget_progress(
-        month=datetime.now().month,
-        year=datetime.now().year,
-        db=db,
-        current_user=current_user
-    )
+    budget_progress = [
+        BudgetProgress(**item)
+        for item in BudgetProgressService(db).get_progress(current_user.id, datetime.now())
+    ]
 
     # Get savings goals progress
     savings_goals = get_savings_goals(db=db, current_user=current_user)
 
     return FinancialSummary(
-        total_income=income,
-        total_expenses=expenses,
-        total_savings=income - expenses,
+        total_income=summary['total_income'],
+        total_expenses=summary['total_expenses'],
+        total_savings=summary['total_income'] - summary['total_expenses'],
         net_worth=snapshot.net_worth if snapshot else 0,
-        monthly_totals=monthly_totals,
-        category_totals=category_totals,
+        monthly_totals=summary['monthly_totals'],
+        category_totals=summary['category_totals'],
         budget_progress=budget_progress,
         savings_goals_progress=savings_goals
     )
 
 # Visualization endpoints
 @router.get("/visualizations/spending-by-category")
-async def get_spending_by_category(
+def get_spending_by_category(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     chart_type: str = "pie",
+    image: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -469,46 +541,51 @@ async def get_spending_by_category(
         current_user.id,
         start_date,
         end_date,
-        chart_type
+        chart_type,
+        image=image
     )
 
 @router.get("/visualizations/income-vs-expenses")
-async def get_income_vs_expenses(
+def get_income_vs_expenses(
     months: int = Query(12, ge=1, le=60),
+    image: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get income vs expenses trend visualization."""
     visualization_service = VisualizationService(db)
-    return visualization_service.income_vs_expenses(current_user.id, months)
+    return visualization_service.income_vs_expenses(current_user.id, months, image=image)
 
 @router.get("/visualizations/budget-progress")
-async def get_budget_progress(
+def get_budget_progress_visualization(
     month: Optional[datetime] = None,
+    image: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get budget progress visualization."""
     visualization_service = VisualizationService(db)
-    return visualization_service.budget_progress(current_user.id, month)
+    return visualization_service.budget_progress(current_user.id, month, image=image)
 
 @router.get("/visualizations/savings-goals")
-async def get_savings_goals_progress(
+def get_savings_goals_progress(
+    image: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get savings goals progress visualization."""
     visualization_service = VisualizationService(db)
-    return visualization_service.savings_goals_progress(current_user.id)
+    return visualization_service.savings_goals_progress(current_user.id, image=image)
 
 @router.get("/visualizations/financial-health")
-async def get_financial_health_dashboard(
+def get_financial_health_dashboard(
+    image: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get comprehensive financial health dashboard."""
     visualization_service = VisualizationService(db)
-    return visualization_service.financial_health_dashboard(current_user.id)
+    return visualization_service.financial_health_dashboard(current_user.id, image=image)
 
 # Export endpoints
 @router.get("/export/transactions")
@@ -524,17 +601,29 @@ async def export_transactions(
     if not end_date:
         end_date = datetime.now()
 
-    report_generator = ReportGenerator(db, current_user.id)
-    
-    if format == "excel":
-        output = report_generator.generate_transaction_excel(start_date, end_date)
-        headers = {
-            'Content-Disposition': f'attachment; filename="transactions_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.xlsx"'
-        }
-        return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    exporter = TransactionExporter(db, current_user.id)
+    filename = f'transactions_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}'
+
+    if format in ("excel", "xlsx"):
+        output = exporter.stream_xlsx(start_date, end_date)
+        extension = "xlsx"
+        media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    elif format == "csv":
+        output = exporter.stream_csv(start_date, end_date)
+        extension = "csv"
+        media_type = 'text/csv'
+    elif format == "parquet":
+        output = exporter.stream_parquet(start_date, end_date)
+        extension = "parquet"
+        media_type = 'application/vnd.apache.parquet'
     else:
         raise HTTPException(status_code=400, detail="Unsupported format")
 
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}.{extension}"'
+    }
+    return StreamingResponse(output, headers=headers, media_type=media_type)
+
 @router.get("/export/budget-report")
 async def export_budget_report(
     format: str = "pdf",
@@ -546,11 +635,12 @@ async def export_budget_report(
     if format == "pdf":
         start_date = datetime.now().replace(day=1)
         end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        output = report_generator.generate_pdf_report(
+        output = BytesIO(await report_jobs.render(
+            current_user.id,
             start_date,
             end_date,
-            include_sections=['budgets']
-        )
+            ['budgets']
+        ))
         headers = {
             'Content-Disposition': f'attachment; filename="budget_report_{start_date.strftime("%Y%m")}.pdf"'
         }
@@ -571,11 +661,12 @@ async def export_savings_report(
     if format == "pdf":
         start_date = datetime.now() - timedelta(days=180)
         end_date = datetime.now()
-        output = report_generator.generate_pdf_report(
+        output = BytesIO(await report_jobs.render(
+            current_user.id,
             start_date,
             end_date,
-            include_sections=['savings']
-        )
+            ['savings']
+        ))
         headers = {
             'Content-Disposition': f'attachment; filename="savings_report_{end_date.strftime("%Y%m%d")}.pdf"'
         }
@@ -596,11 +687,12 @@ async def export_financial_health(
     if format == "pdf":
         start_date = datetime.now() - timedelta(days=365)
         end_date = datetime.now()
-        output = report_generator.generate_pdf_report(
+        output = BytesIO(await report_jobs.render(
+            current_user.id,
             start_date,
             end_date,
-            include_sections=['health']
-        )
+            ['health']
+        ))
         headers = {
             'Content-Disposition': f'attachment; filename="financial_health_{end_date.strftime("%Y%m%d")}.pdf"'
         }
@@ -622,14 +714,72 @@ async def export_complete_report(
     if not end_date:
         end_date = datetime.now()
 
-    report_generator = ReportGenerator(db, current_user.id)
-    output = report_generator.generate_pdf_report(
+    output = BytesIO(await report_jobs.render(
+        current_user.id,
         start_date,
         end_date,
-        include_sections=['transactions', 'budgets', 'savings', 'health']
-    )
+        ['transactions', 'budgets', 'savings', 'health']
+    ))
     
     headers = {
         'Content-Disposition': f'attachment; filename="financial_report_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.pdf"'
     }
     return StreamingResponse(output, headers=headers, media_type='application/pdf')
+
+# Background report jobs
+REPORT_SECTIONS = {'transactions', 'budgets', 'savings', 'health'}
+
+@router.post("/export/reports", response_model=ReportJobSchema)
+async def submit_report_job(
+    report: ReportJobCreate,
+    current_user = Depends(get_current_user)
+):
+    """Queue a PDF report for background rendering."""
+    unknown = set(report.sections) - REPORT_SECTIONS
+    if not report.sections or unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported sections: {sorted(unknown)}")
+
+    start_date = report.start_date or datetime.now() - timedelta(days=30)
+    end_date = report.end_date or datetime.now()
+    job = await run_in_threadpool(
+        report_jobs.submit,
+        current_user.id,
+        start_date,
+        end_date,
+        report.sections
+    )
+    return ReportJobSchema(**job)
+
+@router.get("/export/reports/{job_id}", response_model=ReportJobSchema)
+async def get_report_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Poll the status of a queued report."""
+    job = await run_in_threadpool(report_jobs.get, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return ReportJobSchema(**job)
+
+@router.get("/export/reports/{job_id}/download")
+async def download_report_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Download a finished report."""
+    job = await run_in_threadpool(report_jobs.get, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Report generation failed: {job['error']}")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail="Report is not ready yet")
+
+    headers = {
+        'Content-Disposition': f'attachment; filename="financial_report_{job["start_date"].strftime("%Y%m%d")}_{job["end_date"].strftime("%Y%m%d")}.pdf"'
+    }
+    try:
+        pdf = await run_in_threadpool(report_jobs.result, job)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Report has expired")
+    return StreamingResponse(BytesIO(pdf), headers=headers, media_type='application/pdf')
@@ -29,7 +29,7 @@ async def websocket_endpoint(
             data = await websocket.receive_json()
             # Handle different types of messages
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await manager.send_to(websocket, user_id, {"type": "pong"})
             else:
                 # Process other message types
                 await manager.send_personal_message(
@@ -56,6 +56,10 @@ class Transaction(TransactionBase):
     class Config:
         orm_mode = True
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
 class BudgetBase(BaseModel):
     category: TransactionCategory
     amount: float = Field(..., gt=0)
@@ -174,6 +178,21 @@ class RecurringTransaction(RecurringTransactionBase):
     class Config:
         orm_mode = True
 
+class ReportJobCreate(BaseModel):
+    sections: List[str] = ['transactions', 'budgets', 'savings', 'health']
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+class ReportJob(BaseModel):
+    id: str
+    status: str  # "pending", "running", "completed", "failed"
+    sections: List[str]
+    start_date: datetime
+    end_date: datetime
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
+
 # Response models for aggregated data
 class MonthlyTotal(BaseModel):
     month: datetime
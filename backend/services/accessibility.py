@@ -6,7 +6,7 @@ import speech_recognition as sr
 from PIL import Image
 import cv2
 import numpy as np
-from transformers import pipeline
+from .model_registry import pipeline
 import json
 import os
 
@@ -107,7 +107,7 @@ class AccessibilityService:
             image = Image.open(io.BytesIO(image_data))
             
             # Generate caption
-            caption = self.image_captioner(image)[0]['generated_text']
+            caption = (await self.image_captioner.run(image))[0]['generated_text']
             
             # Generate detailed description if requested
             if detail_level == 'detailed':
@@ -127,6 +127,8 @@ class AccessibilityService:
                 'audio_description': audio_description
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
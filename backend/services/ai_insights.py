@@ -1,5 +1,6 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+from functools import partial
 import openai
 from fastapi import HTTPException
 import numpy as np
@@ -18,6 +19,8 @@ from services.finance import FinanceService
 from services.goals import GoalsService
 from services.mood import MoodService
 from services.habits import HabitsService
+from services.inference_executor import inference_executor
+from services.llm_cache import llm_cache
 from services.journal import JournalService
 from services.learning import LearningService
 from services.social import SocialService
@@ -179,19 +182,23 @@ class AIInsightsService:
             
             # Generate recommendations using OpenAI
             prompt = self._create_recommendation_prompt(area, area_data)
-            response = await openai.ChatCompletion.create(
+            content = await llm_cache.complete(
+                partial(inference_executor.run, openai.ChatCompletion.create),
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are an AI wellness assistant providing personalized recommendations."},
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                context={'area': area, 'user_id': user_id}
             )
             
             # Process and structure the recommendations
-            recommendations = self._process_ai_recommendations(response.choices[0].message.content)
+            recommendations = self._process_ai_recommendations(content)
             
             return recommendations
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -2,11 +2,9 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import openai
 from sqlalchemy.orm import Session
-from ..models.user import User
-from ..models.health import HealthMetric, HealthGoal
-from ..models.finance import Transaction, Budget
-from ..models.portal import Portal
 from ..core.config import settings
+from .llm_cache import llm_cache
+from .user_context import user_context_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,9 +23,8 @@ class AIService:
     ) -> Dict[str, Any]:
         """Get personalized AI response based on user context."""
         try:
-            # Get user profile and context
-            user = self.db.query(User).filter(User.id == user_id).first()
-            user_context = self._gather_user_context(user)
+            # Get user profile and context from the cached snapshot
+            user_context = self._gather_user_context(user_id)
             
             if context:
                 user_context.update(context)
@@ -35,19 +32,18 @@ class AIService:
             # Prepare system message
             system_message = self._create_system_message(user_context)
 
-            # Get AI response
-            response = await self.openai.chat.completions.create(
+            # Get AI response, reusing a cached answer for the same prompt and context
+            ai_response = await llm_cache.complete(
+                self.openai.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": message}
                 ],
+                context=user_context,
                 temperature=0.7,
                 max_tokens=2000
             )
-
-            # Extract and process response
-            ai_response = response.choices[0].message.content
             
             # Generate additional insights and recommendations
             insights = await self._generate_insights(user_id, message, ai_response)
@@ -61,66 +57,9 @@ class AIService:
             logger.error(f"Error getting AI response: {str(e)}")
             raise
 
-    def _gather_user_context(self, user: User) -> Dict[str, Any]:
+    def _gather_user_context(self, user_id: int) -> Dict[str, Any]:
         """Gather comprehensive user context for AI personalization."""
-        try:
-            # Get health metrics
-            health_metrics = self.db.query(HealthMetric).filter(
-                HealthMetric.user_id == user.id
-            ).order_by(HealthMetric.timestamp.desc()).limit(10).all()
-
-            # Get financial data
-            transactions = self.db.query(Transaction).filter(
-                Transaction.user_id == user.id
-            ).order_by(Transaction.date.desc()).limit(10).all()
-
-            # Get goals
-            goals = self.db.query(HealthGoal).filter(
-                HealthGoal.user_id == user.id,
-                HealthGoal.status == "in_progress"
-            ).all()
-
-            # Get connected portals
-            portals = self.db.query(Portal).filter(
-                Portal.user_id == user.id
-            ).all()
-
-            return {
-                "user_profile": {
-                    "age": user.age,
-                    "gender": user.gender,
-                    "preferences": user.preferences,
-                    "needs": user.specific_needs,
-                    "goals": [goal.goal_type for goal in goals]
-                },
-                "health_context": {
-                    "metrics": [
-                        {
-                            "type": metric.metric_type.value,
-                            "value": metric.value,
-                            "unit": metric.unit
-                        }
-                        for metric in health_metrics
-                    ],
-                    "conditions": user.health_conditions
-                },
-                "financial_context": {
-                    "recent_transactions": [
-                        {
-                            "category": tx.category,
-                            "amount": tx.amount
-                        }
-                        for tx in transactions
-                    ],
-                    "financial_goals": user.financial_goals
-                },
-                "connected_services": [
-                    portal.portal_type.value for portal in portals
-                ]
-            }
-        except Exception as e:
-            logger.error(f"Error gathering user context: {str(e)}")
-            return {}
+        return user_context_cache.get(self.db, user_id)
 
     def _create_system_message(self, context: Dict[str, Any]) -> str:
         """Create personalized system message based on user context."""
@@ -264,9 +203,7 @@ Remember to:
     async def get_daily_plan(self, user_id: int) -> Dict[str, Any]:
         """Generate personalized daily plan."""
         try:
-            user_context = self._gather_user_context(
-                self.db.query(User).filter(User.id == user_id).first()
-            )
+            user_context = self._gather_user_context(user_id)
 
             response = await self.openai.chat.completions.create(
                 model="gpt-4",
@@ -3,6 +3,7 @@ from fastapi import HTTPException
 from datetime import datetime, timedelta
 import asyncio
 import logging
+import os
 from .omniscient_ai import OmniscientAI
 from .ultimate_ai import UltimateAI
 from .enhanced_education_therapy_ai import EnhancedEducationTherapyAI
@@ -10,7 +11,8 @@ from .life_guide_ai import LifeGuideAI
 from .creative_ai import CreativeAIService
 
 class AIServiceManager:
-    def __init__(self):
+    def __init__(self, timeout: float = float(os.getenv('TIMEOUT', 30))):
+        self.timeout = timeout
         self.setup_logging()
         self.initialize_services()
         self.setup_service_registry()
@@ -100,17 +102,20 @@ class AIServiceManager:
             # Determine appropriate services based on request type
             services = self._get_relevant_services(request_type)
             
-            # Process request through selected services
-            results = {}
-            for service_name, service_info in services.items():
-                service = service_info['service']
-                result = await self._execute_service_request(
-                    service,
+            # Process request through selected services concurrently; each
+            # service gets its own deadline so one slow service cannot hold
+            # up the others
+            responses = await asyncio.gather(*[
+                self._execute_with_timeout(
+                    service_name,
+                    service_info,
                     request_type,
                     context,
                     preferences
                 )
-                results[service_name] = result
+                for service_name, service_info in services.items()
+            ])
+            results = dict(zip(services.keys(), responses))
             
             # Combine and process results
             final_response = self._combine_service_responses(results)
@@ -153,6 +158,35 @@ class AIServiceManager:
         
         return relevant_services
 
+    async def _execute_with_timeout(
+        self,
+        service_name: str,
+        service_info: Dict[str, Any],
+        request_type: str,
+        context: Dict[str, Any],
+        preferences: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Execute a service request, cancelling it once its deadline passes."""
+        timeout = service_info.get('timeout', self.timeout)
+        try:
+            return await asyncio.wait_for(
+                self._execute_service_request(
+                    service_info['service'],
+                    request_type,
+                    context,
+                    preferences
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f"Service {service_name} timed out after {timeout}s"
+            )
+            return {
+                'status': 'error',
+                'error': f'Timed out after {timeout}s'
+            }
+
     async def _execute_service_request(
         self,
         service: Any,
@@ -226,7 +260,7 @@ class AIServiceManager:
         
         # Check for any errors in results
         errors = [
-            f"{service}: {result['error']}"
+            f"{service}: {result.get('error', result.get('message'))}"
             for service, result in results.items()
             if result.get('status') == 'error'
         ]
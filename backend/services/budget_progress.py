@@ -0,0 +1,65 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+from ..models.finance import Budget, TransactionType, TransactionCategory
+from .transaction_rollup import TransactionRollupService
+
+class BudgetProgressService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_progress(
+        self,
+        user_id: int,
+        month: datetime
+    ) -> List[Dict[str, Any]]:
+        """Compute spending against every active budget for a month.
+
+        Spending for all budgeted categories is read from the monthly rollup in
+        one query, so the cost does not grow with budgets or transactions.
+        """
+        month_start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+
+        budgets = self.db.query(Budget).filter(
+            Budget.user_id == user_id,
+            Budget.start_date <= month_start,
+            Budget.end_date >= next_month - timedelta(days=1)
+        ).all()
+
+        if not budgets:
+            return []
+
+        rollups = TransactionRollupService(self.db).get_rollups(
+            user_id,
+            month_start,
+            month_start,
+            type=TransactionType.EXPENSE,
+            categories=list({budget.category for budget in budgets})
+        )
+        spent_by_category = {
+            TransactionCategory(row.category): row.total
+            for row in rollups
+        }
+
+        progress = []
+        for budget in budgets:
+            spent = spent_by_category.get(TransactionCategory(budget.category)) or 0
+            percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
+
+            status = "on_track"
+            if percentage >= 100:
+                status = "exceeded"
+            elif percentage >= (budget.alert_threshold or 0.8) * 100:
+                status = "warning"
+
+            progress.append({
+                'category': budget.category,
+                'budget_amount': budget.amount,
+                'spent_amount': spent,
+                'remaining_amount': budget.amount - spent,
+                'percentage_used': percentage,
+                'status': status
+            })
+
+        return progress
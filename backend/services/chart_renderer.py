@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from typing import Optional
+import plotly.io as pio
+import threading
+import hashlib
+import base64
+import os
+
+def _render_png(figure_json: str) -> bytes:
+    """Render a serialized figure to PNG; runs inside a worker process."""
+    return pio.from_json(figure_json).to_image(format="png")
+
+class ChartRenderer:
+    """Renders Plotly figures to PNG in a process pool with a content-addressed cache.
+
+    Kaleido renders take from half a second to a few seconds, so identical figures
+    (same data and layout) are rendered once and served from the cache afterwards.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = int(os.getenv("CHART_RENDER_WORKERS", 2)),
+        cache_size: int = int(os.getenv("CHART_CACHE_SIZE", 256))
+    ):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def render_base64(self, fig) -> str:
+        """Render a figure to a base64 PNG, reusing a cached render of identical figures."""
+        figure_json = fig.to_json()
+        digest = hashlib.sha256(figure_json.encode()).hexdigest()
+
+        with self.lock:
+            if digest in self.cache:
+                self.cache.move_to_end(digest)
+                return self.cache[digest]
+
+        png = self._get_executor().submit(_render_png, figure_json).result()
+        encoded = base64.b64encode(png).decode()
+
+        with self.lock:
+            self.cache[digest] = encoded
+            self.cache.move_to_end(digest)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return encoded
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        with self.lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+chart_renderer = ChartRenderer()
@@ -0,0 +1,247 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from functools import lru_cache
+from fastapi.concurrency import run_in_threadpool
+import tiktoken
+import asyncio
+import logging
+import openai
+import os
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = "gpt-4"
+CHAT_MAX_TOKENS = 150
+CHAT_PROMPT_BUDGET = int(os.getenv("CHAT_PROMPT_BUDGET", 3000))
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", 40))
+SUMMARY_MAX_TOKENS = 300
+
+# Approximate per-message framing overhead of the chat format
+MESSAGE_OVERHEAD = 4
+
+# Rough characters per token, used when the tokenizer cannot be loaded
+CHARS_PER_TOKEN = 4
+
+_client: Optional[openai.AsyncOpenAI] = None
+
+# Summary folds running after replies, at most one per user at a time
+_fold_tasks: Dict[int, asyncio.Task] = {}
+
+def get_chat_client() -> openai.AsyncOpenAI:
+    """Share one async OpenAI client, created on first use."""
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI()
+    return _client
+
+@lru_cache(maxsize=None)
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """Load the model's tokenizer on first use; ``None`` if it is unavailable.
+
+    tiktoken downloads the encoding the first time, so loading it at import
+    would tie app startup to network access.
+    """
+    try:
+        return tiktoken.encoding_for_model(CHAT_MODEL)
+    except Exception as e:
+        logger.warning(f"Tokenizer for {CHAT_MODEL} unavailable, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(message: Dict[str, str]) -> int:
+    """Count the prompt tokens a chat message costs."""
+    content = message["content"] or ""
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(content) // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD
+    return len(encoding.encode(content)) + MESSAGE_OVERHEAD
+
+class ChatPromptAssembler:
+    """Builds chat prompts from recent history within a fixed token budget.
+
+    The newest turns are included verbatim until the budget (less the reply's
+    ``max_tokens``) is spent. Older turns are folded into a rolling summary
+    kept in the ``history_summary`` entry of each AI reply's ``context``, so the
+    prompt stays the same size however long the conversation grows.
+
+    Folding costs an extra completion, so it runs only when unsummarized turns
+    are about to fall out of the loaded window or their dropped tokens pass
+    half the budget; in between, turns that do not fit are left out. It also
+    runs off the request path: ``assemble`` only notes the turns to fold, and
+    ``schedule_fold``, called once the reply is saved, folds them in the
+    background and stores the result on the user's newest reply.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        budget: int = CHAT_PROMPT_BUDGET,
+        window: int = CHAT_HISTORY_WINDOW,
+        reserve: int = CHAT_MAX_TOKENS
+    ):
+        self.db = db
+        self.budget = budget
+        self.window = window
+        self.reserve = reserve
+        self.pending_fold: Optional[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, str]]]]] = None
+
+    async def assemble(
+        self,
+        user: models.User,
+        content: str
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Build the prompt for a new user message.
+
+        Call this before saving the message. Returns the prompt and the summary
+        state to store in the reply's ``context['history_summary']``.
+        """
+        rows = self.db.query(models.ChatMessage).filter(
+            models.ChatMessage.user_id == user.id
+        ).order_by(
+            models.ChatMessage.timestamp.desc(),
+            models.ChatMessage.id.desc()
+        ).limit(self.window).all()
+
+        summary = self._latest_summary(rows)
+        history = [
+            (row.id, {"role": "assistant" if row.is_ai else "user", "content": row.content or ""})
+            for row in rows
+            if row.id > summary["through_id"]
+        ]
+
+        included, overflow = self._fit(user, content, summary, history)
+        overflow_tokens = sum(count_tokens(message) for _, message in overflow)
+
+        if len(history) >= self.window - 2 or overflow_tokens >= self.budget // 2:
+            # Keep the newest half of the window verbatim and fold the rest
+            # after the reply, so this request does not wait on a completion
+            keep = min(len(included), self.window // 2)
+            self.pending_fold = (summary, list(reversed(history[keep:])))
+
+        messages = [self._system_message(user)]
+        if summary["text"]:
+            messages.append(self._summary_message(summary))
+        messages.extend(message for _, message in reversed(included))
+        messages.append({"role": "user", "content": content})
+        return messages, summary
+
+    def _fit(
+        self,
+        user: models.User,
+        content: str,
+        summary: Dict[str, Any],
+        history: List[Tuple[int, Dict[str, str]]]
+    ) -> Tuple[List[Tuple[int, Dict[str, str]]], List[Tuple[int, Dict[str, str]]]]:
+        """Split newest-first history into the turns that fit and those that do not."""
+        available = self.budget - self.reserve
+        available -= count_tokens(self._system_message(user))
+        available -= count_tokens({"role": "user", "content": content})
+        if summary["text"]:
+            available -= count_tokens(self._summary_message(summary))
+
+        for index, (_, message) in enumerate(history):
+            available -= count_tokens(message)
+            if available < 0:
+                return history[:index], history[index:]
+        return history, []
+
+    def schedule_fold(self, user_id: int) -> None:
+        """Start folding the turns noted by ``assemble`` unless the user already has a fold running."""
+        if self.pending_fold is None or user_id in _fold_tasks:
+            return
+        summary, turns = self.pending_fold
+        self.pending_fold = None
+        task = asyncio.create_task(self._fold_and_store(user_id, summary, turns))
+        _fold_tasks[user_id] = task
+        task.add_done_callback(lambda _: _fold_tasks.pop(user_id, None))
+
+    async def _fold_and_store(
+        self,
+        user_id: int,
+        summary: Dict[str, Any],
+        turns: List[Tuple[int, Dict[str, str]]]
+    ) -> None:
+        folded = await self._fold(summary, turns)
+        if folded is not summary:
+            await run_in_threadpool(_store_summary, user_id, folded)
+
+    async def _fold(
+        self,
+        summary: Dict[str, Any],
+        turns: List[Tuple[int, Dict[str, str]]]
+    ) -> Dict[str, Any]:
+        """Merge the given oldest-first turns into the rolling summary."""
+        if not turns:
+            return summary
+
+        transcript = "\n".join(
+            f"{'Assistant' if message['role'] == 'assistant' else 'User'}: {message['content']}"
+            for _, message in turns
+        )
+        try:
+            response = await get_chat_client().chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": "Update the running summary of this conversation. Keep facts, goals, feelings and commitments the assistant should remember. Reply with the summary only."},
+                    {"role": "user", "content": f"Summary so far:\n{summary['text'] or '(none)'}\n\nNew turns:\n{transcript}"}
+                ],
+                max_tokens=SUMMARY_MAX_TOKENS,
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(f"Error summarizing chat history: {str(e)}")
+            return summary
+
+        return {
+            "text": response.choices[0].message.content,
+            "through_id": turns[-1][0]
+        }
+
+    def _latest_summary(self, rows: List[models.ChatMessage]) -> Dict[str, Any]:
+        """Find the summary state carried on the newest AI reply."""
+        for row in rows:
+            if row.is_ai and isinstance(row.context, dict) and row.context.get("history_summary"):
+                return row.context["history_summary"]
+        return {"text": "", "through_id": 0}
+
+    def _system_message(self, user: models.User) -> Dict[str, str]:
+        return {
+            "role": "system",
+            "content": f"You are a supportive AI assistant helping {user.full_name}. "
+                      f"User age: {user.age}, Gender: {user.gender}"
+        }
+
+    def _summary_message(self, summary: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary['text']}"
+        }
+
+def with_history_summary(context: Optional[Dict[str, Any]], summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach the rolling summary to the context stored on an AI reply."""
+    return {**(context or {}), "history_summary": summary}
+
+def _store_summary(user_id: int, summary: Dict[str, Any]) -> None:
+    """Put a folded summary on the user's newest AI reply unless it already covers more."""
+    db = SessionLocal()
+    try:
+        row = db.query(models.ChatMessage).filter(
+            models.ChatMessage.user_id == user_id,
+            models.ChatMessage.is_ai == True
+        ).order_by(
+            models.ChatMessage.timestamp.desc(),
+            models.ChatMessage.id.desc()
+        ).first()
+        if row is None:
+            return
+        current = row.context.get("history_summary") if isinstance(row.context, dict) else None
+        if current and current.get("through_id", 0) >= summary["through_id"]:
+            return
+        row.context = with_history_summary(row.context, summary)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error storing chat history summary: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,95 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from sqlalchemy.orm import Session
+import logging
+import json
+import models
+from services.llm_cache import llm_cache
+from services.chat_prompt import (
+    ChatPromptAssembler, get_chat_client, with_history_summary, CHAT_MODEL, CHAT_MAX_TOKENS
+)
+
+logger = logging.getLogger(__name__)
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode a stream event as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+class ChatStreamService:
+    """Streams chat replies token by token and stores the finished message.
+
+    Yields ``token`` events as the completion arrives and a final ``done`` event
+    carrying the persisted ``ChatMessage``; a failed completion yields an
+    ``error`` event and stores nothing. Replies go through the LLM response
+    cache, so a cached answer is sent as a single token event.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def stream_reply(
+        self,
+        user: models.User,
+        content: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Save the user's message, then stream and save the AI reply."""
+        assembler = ChatPromptAssembler(self.db)
+        messages, summary = await assembler.assemble(user, content)
+
+        self.db.add(models.ChatMessage(
+            user_id=user.id,
+            content=content,
+            is_ai=False,
+            context=context
+        ))
+        self.db.commit()
+
+        key = llm_cache.key(CHAT_MODEL, messages, context, max_tokens=CHAT_MAX_TOKENS)
+        reply = llm_cache.get(key)
+
+        try:
+            if reply is not None:
+                yield {"type": "token", "content": reply}
+            else:
+                parts = []
+                stream = await get_chat_client().chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    max_tokens=CHAT_MAX_TOKENS,
+                    stream=True
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield {"type": "token", "content": delta}
+
+                reply = "".join(parts)
+                llm_cache.set(key, reply)
+        except Exception as e:
+            logger.error(f"Error streaming chat reply: {str(e)}")
+            yield {"type": "error", "detail": str(e)}
+            return
+
+        ai_message = models.ChatMessage(
+            user_id=user.id,
+            content=reply,
+            is_ai=True,
+            context=with_history_summary(context, summary)
+        )
+        self.db.add(ai_message)
+        self.db.commit()
+        self.db.refresh(ai_message)
+        assembler.schedule_fold(user.id)
+
+        yield {
+            "type": "done",
+            "message": {
+                "id": ai_message.id,
+                "user_id": ai_message.user_id,
+                "content": ai_message.content,
+                "is_ai": ai_message.is_ai,
+                "timestamp": ai_message.timestamp,
+                "context": ai_message.context
+            }
+        }
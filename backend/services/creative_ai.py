@@ -6,7 +6,7 @@ import numpy as np
 import threading
 import queue
 import time
-from transformers import pipeline
+from .model_registry import pipeline
 from PIL import Image
 import io
 import torch
@@ -0,0 +1,202 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import and_, or_
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import logging
+import os
+from ..database import SessionLocal
+from ..models.user import User
+from ..models.notification import NotificationPreference, NotificationType, EmailDelivery
+from .email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Spaces out acquisitions to at most ``rate`` per second; 0 disables the limit."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class EmailFanOut:
+    """Sends a scheduled email to every subscribed user as a two-stage pipeline.
+
+    Recipients are loaded with one join over preferences and users. Their
+    charts and PDFs are rendered on a thread pool, each render with its own
+    database session, and handed through a bounded queue to senders that run
+    with limited concurrency and a global rate limit. Each user's outcome is
+    written to ``email_deliveries`` under a run key for the period, so a rerun
+    after a crash skips users who were already sent to and retries failures up
+    to ``max_attempts``.
+    """
+
+    BUILDERS = {
+        NotificationType.WEEKLY_SUMMARY: "build_weekly_summary",
+        NotificationType.MONTHLY_REPORT: "build_monthly_report"
+    }
+
+    def __init__(
+        self,
+        render_workers: int = int(os.getenv("EMAIL_RENDER_WORKERS", 4)),
+        send_concurrency: int = int(os.getenv("EMAIL_SEND_CONCURRENCY", 10)),
+        rate_limit: float = float(os.getenv("EMAIL_RATE_LIMIT", 10)),
+        max_attempts: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", 3)),
+        email_service: Optional[EmailService] = None
+    ):
+        self.render_workers = render_workers
+        self.send_concurrency = send_concurrency
+        self.rate_limit = rate_limit
+        self.max_attempts = max_attempts
+        self.email_service = email_service or EmailService()
+        self.executor = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix="email-render")
+
+    def run_key(self, notification_type: NotificationType, now: Optional[datetime] = None) -> str:
+        """Identify the period a scheduled email belongs to."""
+        now = now or datetime.utcnow()
+        if notification_type == NotificationType.MONTHLY_REPORT:
+            return f"{notification_type.value}:{now.strftime('%Y-%m')}"
+        year, week, _ = now.isocalendar()
+        return f"{notification_type.value}:{year}-W{week:02d}"
+
+    async def run(self, notification_type: NotificationType, run_key: Optional[str] = None) -> Dict[str, int]:
+        """Send one period's emails, resuming a previous attempt with the same run key."""
+        run_key = run_key or self.run_key(notification_type)
+        builder = getattr(self.email_service, self.BUILDERS[notification_type])
+        recipients = await run_in_threadpool(self.recipients, notification_type, run_key)
+
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue()
+        rendered: asyncio.Queue = asyncio.Queue(maxsize=self.send_concurrency * 2)
+        limiter = RateLimiter(self.rate_limit)
+        counts = {"recipients": len(recipients), "sent": 0, "failed": 0}
+
+        for recipient in recipients:
+            pending.put_nowait(recipient)
+
+        async def record(recipient: Dict[str, Any], error: Optional[str]) -> None:
+            # Saved right after each send, so a crash can only repeat sends
+            # that were still in flight
+            counts["failed" if error else "sent"] += 1
+            await run_in_threadpool(self.save_progress, run_key, [{**recipient, "error": error}])
+
+        async def render_worker() -> None:
+            while not pending.empty():
+                recipient = pending.get_nowait()
+                try:
+                    message = await loop.run_in_executor(
+                        self.executor, self._render, builder, recipient["user_id"]
+                    )
+                except Exception as e:
+                    logger.error(f"Error rendering {run_key} for user {recipient['user_id']}: {str(e)}")
+                    await record(recipient, str(e))
+                    continue
+                await rendered.put((recipient, message))
+
+        async def send_worker() -> None:
+            while True:
+                recipient, message = await rendered.get()
+                try:
+                    await limiter.acquire()
+                    await self.email_service.send_report(recipient["email"], **message)
+                    await record(recipient, None)
+                except Exception as e:
+                    logger.error(f"Error sending {run_key} to user {recipient['user_id']}: {str(e)}")
+                    await record(recipient, str(e))
+                finally:
+                    rendered.task_done()
+
+        senders = [asyncio.create_task(send_worker()) for _ in range(self.send_concurrency)]
+        try:
+            await asyncio.gather(*(render_worker() for _ in range(self.render_workers)))
+            await rendered.join()
+        finally:
+            for sender in senders:
+                sender.cancel()
+
+        logger.info(f"Finished {run_key}: {counts}")
+        return counts
+
+    def recipients(self, notification_type: NotificationType, run_key: str) -> List[Dict[str, Any]]:
+        """Load subscribed users not yet sent to in this run, in one query."""
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                User.id, User.email, EmailDelivery.id, EmailDelivery.attempts
+            ).join(
+                NotificationPreference, NotificationPreference.user_id == User.id
+            ).outerjoin(
+                EmailDelivery,
+                and_(EmailDelivery.user_id == User.id, EmailDelivery.run_key == run_key)
+            ).filter(
+                NotificationPreference.notification_type == notification_type,
+                NotificationPreference.email_enabled == True,
+                User.email != None,
+                or_(
+                    EmailDelivery.id == None,
+                    and_(EmailDelivery.status != "sent", EmailDelivery.attempts < self.max_attempts)
+                )
+            ).distinct().order_by(User.id).all()
+        finally:
+            db.close()
+
+        return [
+            {"user_id": user_id, "email": email, "delivery_id": delivery_id, "attempts": attempts or 0}
+            for user_id, email, delivery_id, attempts in rows
+        ]
+
+    def save_progress(self, run_key: str, results: List[Dict[str, Any]]) -> None:
+        """Record the outcome of recipients' sends."""
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        for result in results:
+            row = {
+                "status": "failed" if result["error"] else "sent",
+                "attempts": result["attempts"] + 1,
+                "error": result["error"],
+                "updated_at": now
+            }
+            if result["delivery_id"]:
+                updates.append({"id": result["delivery_id"], **row})
+            else:
+                inserts.append({"run_key": run_key, "user_id": result["user_id"], **row})
+
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(EmailDelivery, inserts)
+            db.bulk_update_mappings(EmailDelivery, updates)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving progress of {run_key}: {str(e)}")
+        finally:
+            db.close()
+
+    def _render(self, builder, user_id: int) -> Dict[str, Any]:
+        """Build one user's message on a worker thread."""
+        db = SessionLocal()
+        try:
+            return builder(user_id, db)
+        finally:
+            db.close()
+
+_email_fanout: Optional[EmailFanOut] = None
+
+def get_email_fanout() -> EmailFanOut:
+    """The shared fan-out, created on first use rather than at import."""
+    global _email_fanout
+    if _email_fanout is None:
+        _email_fanout = EmailFanOut()
+    return _email_fanout
@@ -1,31 +1,16 @@
-import os
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import EmailStr
 from jinja2 import Environment, select_autoescape, PackageLoader
-from pathlib import Path
 import aiofiles
 from ..models.notification import NotificationPreference, NotificationType
 from .report_generator import ReportGenerator
 from .visualization import VisualizationService
+from .mail_transport import MailTransport, mail_transport, build_message
 
 class EmailService:
-    def __init__(self):
-        self.config = ConnectionConfig(
-            MAIL_USERNAME=os.getenv("SMTP_USERNAME"),
-            MAIL_PASSWORD=os.getenv("SMTP_PASSWORD"),
-            MAIL_FROM=os.getenv("EMAIL_FROM"),
-            MAIL_PORT=int(os.getenv("SMTP_PORT", "587")),
-            MAIL_SERVER=os.getenv("SMTP_SERVER"),
-            MAIL_FROM_NAME="AI Support App",
-            MAIL_STARTTLS=True,
-            MAIL_SSL_TLS=False,
-            USE_CREDENTIALS=True,
-            TEMPLATE_FOLDER=Path(__file__).parent.parent / "templates" / "email"
-        )
-        
-        self.fast_mail = FastMail(self.config)
+    def __init__(self, transport: Optional[MailTransport] = None):
+        self.transport = transport or mail_transport
         self.env = Environment(
             loader=PackageLoader("app", "templates/email"),
             autoescape=select_autoescape(['html', 'xml'])
@@ -42,17 +27,14 @@ class EmailService:
         template = self.env.get_template(f"{report_type}.html")
         html_content = template.render(**data)
 
-        message = MessageSchema(
-            subject=f"Your {report_type.replace('_', ' ').title()} Report",
-            recipients=[email],
-            body=html_content,
-            subtype="html"
+        message = build_message(
+            email,
+            f"Your {report_type.replace('_', ' ').title()} Report",
+            html_content,
+            attachments
         )
 
-        if attachments:
-            message.attachments = attachments
-
-        await self.fast_mail.send_message(message)
+        await self.transport.send(message)
 
     async def send_weekly_summary(
         self,
@@ -61,6 +43,13 @@ class EmailService:
         db_session
     ) -> None:
         """Send weekly financial summary email."""
+        await self.send_report(email, **self.build_weekly_summary(user_id, db_session))
+
+    def build_weekly_summary(self, user_id: int, db_session) -> Dict[str, Any]:
+        """Render the charts and PDF of a weekly summary as ``send_report`` arguments.
+
+        Blocking; bulk senders run it on worker threads.
+        """
         # Generate visualizations
         viz_service = VisualizationService(db_session)
         report_gen = ReportGenerator(db_session, user_id)
@@ -100,17 +89,15 @@ class EmailService:
             include_sections=['transactions', 'budgets', 'savings', 'health']
         )
 
-        # Send email with attachment
-        await self.send_report(
-            email,
-            "weekly_summary",
-            data,
-            attachments=[{
+        return {
+            "report_type": "weekly_summary",
+            "data": data,
+            "attachments": [{
                 "file": pdf_report,
                 "filename": f"financial_summary_{datetime.utcnow().strftime('%Y%m%d')}.pdf",
                 "content_type": "application/pdf"
             }]
-        )
+        }
 
     async def send_monthly_report(
         self,
@@ -119,6 +106,13 @@ class EmailService:
         db_session
     ) -> None:
         """Send monthly financial report email."""
+        await self.send_report(email, **self.build_monthly_report(user_id, db_session))
+
+    def build_monthly_report(self, user_id: int, db_session) -> Dict[str, Any]:
+        """Render the dashboard and PDF of a monthly report as ``send_report`` arguments.
+
+        Blocking; bulk senders run it on worker threads.
+        """
         report_gen = ReportGenerator(db_session, user_id)
         viz_service = VisualizationService(db_session)
 
@@ -143,17 +137,15 @@ class EmailService:
             include_sections=['transactions', 'budgets', 'savings', 'health']
         )
 
-        # Send email with attachment
-        await self.send_report(
-            email,
-            "monthly_report",
-            data,
-            attachments=[{
+        return {
+            "report_type": "monthly_report",
+            "data": data,
+            "attachments": [{
                 "file": pdf_report,
                 "filename": f"monthly_report_{start_date.strftime('%Y%m')}.pdf",
                 "content_type": "application/pdf"
             }]
-        )
+        }
 
     async def send_budget_alert(
         self,
@@ -2,7 +2,7 @@ from typing import Dict, List, Optional, Any
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 import asyncio
-from transformers import pipeline
+from .model_registry import pipeline
 import openai
 import numpy as np
 import json
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+from ..websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+class FinanceEventCoalescer:
+    """Batches a user's finance changes into one ``finance_changes`` message.
+
+    Changes recorded within ``window`` seconds of a user's first pending change
+    are sent together, or sooner once ``max_batch`` entities are pending.
+    Repeated changes to the same entity collapse into one delta: a create
+    followed by updates stays a create with the latest data, and a create
+    followed by a delete cancels out.
+    """
+
+    def __init__(
+        self,
+        window: float = float(os.getenv("FINANCE_EVENT_WINDOW_MS", 250)) / 1000,
+        max_batch: int = int(os.getenv("FINANCE_EVENT_MAX_BATCH", 500))
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: Dict[str, "OrderedDict[Tuple[str, Any], Dict[str, Any]]"] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.tasks: Set[asyncio.Task] = set()
+
+    def record(
+        self,
+        user_id: Any,
+        entity: str,
+        action: str,
+        data: Optional[Dict[str, Any]] = None,
+        entity_id: Any = None
+    ) -> None:
+        """Queue a change; must be called from the event loop."""
+        user_id = str(user_id)
+        if entity_id is None and data:
+            entity_id = data.get('id')
+
+        changes = self.pending.setdefault(user_id, OrderedDict())
+        key = (entity, entity_id)
+        previous = changes.get(key)
+
+        if previous and previous['action'] == 'created':
+            if action == 'deleted':
+                del changes[key]
+            else:
+                previous['data'] = data
+        elif previous and previous['action'] == 'updated' and action == 'updated':
+            previous['data'] = data
+        else:
+            changes[key] = {
+                'entity': entity,
+                'action': action,
+                'id': entity_id,
+                'data': data
+            }
+
+        if len(changes) >= self.max_batch:
+            self._schedule_flush(user_id)
+        elif user_id not in self.timers:
+            self.timers[user_id] = asyncio.get_running_loop().call_later(
+                self.window, self._schedule_flush, user_id
+            )
+
+    async def flush(self, user_id: Any) -> None:
+        """Send a user's pending changes now."""
+        user_id = str(user_id)
+        timer = self.timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+
+        changes = self.pending.pop(user_id, None)
+        if not changes:
+            return
+
+        try:
+            await manager.send_personal_message(
+                {
+                    "type": "finance_changes",
+                    "data": {"changes": list(changes.values())}
+                },
+                user_id
+            )
+        except Exception as e:
+            logger.error(f"Error sending finance changes to user {user_id}: {str(e)}")
+
+    def _schedule_flush(self, user_id: str) -> None:
+        timer = self.timers.pop(user_id, None)
+        if timer:
+            # An early flush at max_batch must not leave the window timer armed
+            timer.cancel()
+        task = asyncio.ensure_future(self.flush(user_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+finance_events = FinanceEventCoalescer()
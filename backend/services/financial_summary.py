@@ -0,0 +1,131 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from ..models.finance import Transaction, TransactionType
+from ..schemas.finance import MonthlyTotal, CategoryTotal
+from .transaction_rollup import TransactionRollupService
+
+class FinancialSummaryService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_summary(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, Any]:
+        """Aggregate income, expenses, monthly and category totals.
+
+        Whole months are read from the monthly rollup, so the cost grows with the
+        number of months rather than transactions. Only the partial months at the
+        edges of the range are summed from raw transactions, in one grouped query.
+        """
+        month_starts = self._month_starts(start_date, end_date)
+        full_months = [
+            month_start for month_start in month_starts
+            if month_start >= start_date and self._next_month(month_start) <= end_date
+        ]
+        full_month_keys = {(m.year, m.month) for m in full_months}
+
+        monthly = {m: {'income': 0.0, 'expense': 0.0} for m in month_starts}
+        categories: Dict[Any, Dict[str, Any]] = {}
+        totals = {'income': 0.0, 'expense': 0.0}
+
+        def add_to_range(kind: str, category: Any, amount: float, count: int) -> None:
+            totals[kind] += amount
+            if kind == 'expense' and count:
+                category_totals = categories.setdefault(category, {'amount': 0.0, 'count': 0})
+                category_totals['amount'] += amount
+                category_totals['count'] += count
+
+        rollups = TransactionRollupService(self.db).get_rollups(
+            user_id,
+            month_starts[0],
+            month_starts[-1]
+        )
+        for row in rollups:
+            kind = self._kind(row.type)
+            if not kind:
+                continue
+            monthly[datetime(row.year, row.month, 1)][kind] += row.total or 0
+            if (row.year, row.month) in full_month_keys:
+                add_to_range(kind, row.category, row.total or 0, row.count)
+
+        # Partial months at the edges of the range come from raw transactions
+        edge_filter = Transaction.date.between(start_date, end_date)
+        if full_months:
+            edge_filter = and_(edge_filter, or_(
+                Transaction.date < full_months[0],
+                Transaction.date >= self._next_month(full_months[-1])
+            ))
+
+        edge_rows = self.db.query(
+            Transaction.type,
+            Transaction.category,
+            func.sum(Transaction.amount).label('total'),
+            func.count(Transaction.id).label('count')
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+            edge_filter
+        ).group_by(Transaction.type, Transaction.category).all()
+
+        for row in edge_rows:
+            add_to_range(self._kind(row.type), row.category, row.total or 0, row.count)
+
+        income = totals['income']
+        expenses = totals['expense']
+
+        monthly_totals = [
+            MonthlyTotal(
+                month=month_start,
+                income=month['income'],
+                expenses=month['expense'],
+                savings=month['income'] - month['expense'],
+                net=month['income'] - month['expense']
+            )
+            for month_start, month in monthly.items()
+        ]
+
+        category_totals = [
+            CategoryTotal(
+                category=category,
+                amount=category_total['amount'],
+                percentage=(category_total['amount'] / expenses * 100) if expenses > 0 else 0,
+                transaction_count=category_total['count']
+            )
+            for category, category_total in categories.items()
+        ]
+
+        return {
+            'total_income': income,
+            'total_expenses': expenses,
+            'monthly_totals': monthly_totals,
+            'category_totals': category_totals
+        }
+
+    def _kind(self, transaction_type: Any) -> Optional[str]:
+        """Map a transaction type to the summary bucket it counts towards."""
+        if transaction_type == TransactionType.INCOME:
+            return 'income'
+        if transaction_type == TransactionType.EXPENSE:
+            return 'expense'
+        return None
+
+    def _month_starts(self, start_date: datetime, end_date: datetime) -> List[datetime]:
+        """List the first day of every month between two dates (inclusive)."""
+        current = datetime(start_date.year, start_date.month, 1)
+        months = [current]
+        while True:
+            current = self._next_month(current)
+            if current > end_date:
+                return months
+            months.append(current)
+
+    def _next_month(self, month_start: datetime) -> datetime:
+        """Get the first day of the following month."""
+        if month_start.month == 12:
+            return datetime(month_start.year + 1, 1, 1)
+        return datetime(month_start.year, month_start.month + 1, 1)
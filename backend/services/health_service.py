@@ -13,6 +13,7 @@ from ..models.health import (
 )
 from ..core.config import settings
 from ..services.push_notification import PushNotificationService
+from ..services.llm_cache import llm_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -121,17 +122,19 @@ class HealthService:
             ]
 
             # Get AI analysis
-            response = await self.openai.chat.completions.create(
+            # The same medication list always gets the same analysis, so
+            # repeated checks (e.g. after each medication change) reuse it
+            analysis = await llm_cache.complete(
+                self.openai.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a medication interaction checker. Analyze the list of medications and identify potential interactions or concerns."},
-                    {"role": "user", "content": str(med_list)}
+                    {"role": "user", "content": str(sorted(med_list, key=lambda med: str(med['name'])))}
                 ],
+                ttl=24 * 3600,
                 temperature=0.3
             )
 
-            analysis = response.choices[0].message.content
-
             # Create health insight
             insight = HealthInsight(
                 user_id=user_id,
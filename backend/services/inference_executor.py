@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+from fastapi import HTTPException
+import asyncio
+import threading
+import os
+
+class InferenceExecutor:
+    """Bounded thread pool for blocking model and LLM calls.
+
+    Async handlers submit inference here instead of calling models inline, so a
+    slow generation no longer stalls the event loop. Up to ``max_workers`` calls
+    run at once and ``max_pending`` more may wait; beyond that new work is
+    rejected with a 429 so callers back off instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = int(os.getenv("MAX_WORKERS", 8)),
+        max_pending: int = int(os.getenv("BATCH_SIZE", 32))
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_pending
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the pool, or raise 429 when the queue is full."""
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Inference capacity exhausted, please retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self.in_flight += 1
+
+        # The slot is released when the work finishes rather than when the
+        # caller stops waiting, so cancelled requests still count until their
+        # thread is free again
+        future = self.executor.submit(partial(func, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Report current load against capacity."""
+        with self.lock:
+            return {
+                'max_workers': self.max_workers,
+                'capacity': self.capacity,
+                'in_flight': self.in_flight
+            }
+
+    def _release(self, future) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+inference_executor = InferenceExecutor()
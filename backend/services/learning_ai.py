@@ -1,6 +1,6 @@
 from typing import Dict, List, Optional, Any
 from fastapi import HTTPException
-from transformers import pipeline
+from .model_registry import pipeline
 import numpy as np
 import json
 import os
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import threading
+import sqlite3
+import hashlib
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """Caches chat completion text keyed by model, parameters, prompt and context.
+
+    Entries live in an in-memory LRU with a TTL. When ``LLM_CACHE_PATH`` is set,
+    they are also written to a SQLite file so they survive restarts and are
+    shared between workers on the same host. Call sites opt in by routing their
+    completion through ``complete``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = int(os.getenv("LLM_CACHE_SIZE", 1024)),
+        ttl: int = int(os.getenv("LLM_CACHE_TTL", 3600)),
+        sqlite_path: Optional[str] = os.getenv("LLM_CACHE_PATH")
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.connection: Optional[sqlite3.Connection] = None
+
+        if sqlite_path:
+            self.connection = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+    def key(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        context: Any = None,
+        **params
+    ) -> str:
+        """Build a cache key from the request and a digest of its context.
+
+        Message content is whitespace-normalized so formatting differences in
+        otherwise identical prompts still hit the same entry.
+        """
+        payload = {
+            'model': model,
+            'params': params,
+            'messages': [
+                {'role': message['role'], 'content': ' '.join(str(message['content']).split())}
+                for message in messages
+            ],
+            'context': hashlib.sha256(
+                json.dumps(context, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, falling back to the SQLite tier."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.metrics['hits'] += 1
+                return entry[0]
+            if entry:
+                del self.entries[key]
+
+            if self.connection:
+                row = self.connection.execute(
+                    "SELECT value, expires_at FROM llm_responses WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0], row[1])
+                    self.metrics['disk_hits'] += 1
+                    return row[0]
+
+            self.metrics['misses'] += 1
+            return None
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store a response in both tiers."""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self.lock:
+            self._remember(key, value, expires_at)
+            if self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                self.connection.commit()
+
+    async def complete(
+        self,
+        create: Callable[..., Awaitable[Any]],
+        model: str,
+        messages: List[Dict[str, str]],
+        context: Any = None,
+        ttl: Optional[int] = None,
+        **params
+    ) -> str:
+        """Return the cached completion text, or call ``create`` and cache its answer.
+
+        ``create`` receives ``model``, ``messages`` and ``params`` and must return
+        an awaitable chat completion response.
+        """
+        key = self.key(model, messages, context, **params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        response = await create(model=model, messages=messages, **params)
+        content = response.choices[0].message.content
+        self.set(key, content, ttl)
+        return content
+
+    def invalidate(self, key: str) -> None:
+        """Drop one entry from both tiers."""
+        with self.lock:
+            self.entries.pop(key, None)
+            if self.connection:
+                self.connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self.connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report hit/miss counts and the current size of the memory tier."""
+        with self.lock:
+            lookups = self.metrics['hits'] + self.metrics['disk_hits'] + self.metrics['misses']
+            return {
+                **self.metrics,
+                'entries': len(self.entries),
+                'hit_rate': (self.metrics['hits'] + self.metrics['disk_hits']) / lookups if lookups else 0.0
+            }
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Put an entry in the memory tier; callers hold the lock."""
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.metrics['evictions'] += 1
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,198 @@
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import List, Dict, Any, Optional, Set
+import aiosmtplib
+import asyncio
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a fresh connection may succeed
+TRANSIENT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError
+)
+
+def build_message(
+    to: str,
+    subject: str,
+    html: str,
+    attachments: Optional[List[Dict[str, Any]]] = None,
+    sender: Optional[str] = None
+) -> EmailMessage:
+    """Build an HTML email; attachments are ``{"file", "filename", "content_type"}`` dicts."""
+    message = EmailMessage()
+    message['From'] = sender or formataddr(("AI Support App", os.getenv("EMAIL_FROM")))
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(html, subtype='html')
+
+    for attachment in attachments or []:
+        content = attachment["file"]
+        if hasattr(content, "getvalue"):
+            content = content.getvalue()
+        elif hasattr(content, "read"):
+            content = content.read()
+        maintype, subtype = attachment.get("content_type", "application/octet-stream").split("/", 1)
+        message.add_attachment(content, maintype=maintype, subtype=subtype, filename=attachment["filename"])
+
+    return message
+
+class PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+class MailTransport:
+    """Sends mail over a pool of persistent SMTP connections.
+
+    Connections are opened (with STARTTLS and login) on demand up to
+    ``pool_size`` and reused for many messages, so a burst of notifications
+    costs one handshake per pooled connection rather than one per message.
+    Connections are recycled after ``max_messages`` or when idle longer than
+    ``idle_timeout``. Transient failures (dropped connections, timeouts and
+    4xx replies) are retried on a fresh connection with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        hostname: Optional[str] = os.getenv("SMTP_SERVER"),
+        port: int = int(os.getenv("SMTP_PORT", 587)),
+        username: Optional[str] = os.getenv("SMTP_USERNAME"),
+        password: Optional[str] = os.getenv("SMTP_PASSWORD"),
+        start_tls: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+        pool_size: int = int(os.getenv("SMTP_POOL_SIZE", 4)),
+        max_messages: int = int(os.getenv("SMTP_MAX_MESSAGES", 100)),
+        idle_timeout: float = float(os.getenv("SMTP_IDLE_TIMEOUT", 60)),
+        retries: int = int(os.getenv("SMTP_RETRIES", 3)),
+        backoff: float = 0.5,
+        timeout: float = 30
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.pool_size = pool_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.idle: List[PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.opened = 0
+        # Background quits, referenced so they are not garbage-collected mid-run
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send one message, retrying transient failures."""
+        for attempt in range(self.retries + 1):
+            connection = None
+            try:
+                # Connecting, STARTTLS and login are retried the same as sending
+                connection = await self._acquire()
+                await connection.smtp.send_message(message)
+            except BaseException as e:
+                if connection:
+                    await self._discard(connection)
+                if attempt == self.retries or not self._is_transient(e):
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"SMTP send failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                connection.sent += 1
+                self._release(connection)
+                return
+
+    async def send_many(self, messages: List[EmailMessage]) -> List[Optional[Exception]]:
+        """Send messages concurrently over the pool; returns each message's error, if any."""
+        results = await asyncio.gather(
+            *(self.send(message) for message in messages),
+            return_exceptions=True
+        )
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    async def close(self) -> None:
+        """Close idle connections."""
+        idle, self.idle = self.idle, []
+        for connection in idle:
+            await self._quit(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "idle": len(self.idle),
+            "opened": self.opened
+        }
+
+    async def _acquire(self) -> PooledConnection:
+        """Take an idle connection or open one once a pool slot is free."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        await self._slots.acquire()
+
+        smtp = None
+        try:
+            while self.idle:
+                connection = self.idle.pop()
+                if (
+                    connection.smtp.is_connected
+                    and time.monotonic() - connection.last_used < self.idle_timeout
+                ):
+                    return connection
+                await self._quit(connection)
+
+            smtp = aiosmtplib.SMTP(
+                hostname=self.hostname,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                start_tls=self.start_tls,
+                timeout=self.timeout
+            )
+            await smtp.connect()
+            self.opened += 1
+            return PooledConnection(smtp)
+        except BaseException:
+            self._slots.release()
+            if smtp is not None:
+                smtp.close()
+            raise
+
+    def _release(self, connection: PooledConnection) -> None:
+        """Return a connection to the pool, or close it once it has sent enough."""
+        if connection.sent >= self.max_messages:
+            task = asyncio.ensure_future(self._quit(connection))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        else:
+            connection.last_used = time.monotonic()
+            self.idle.append(connection)
+        self._slots.release()
+
+    async def _discard(self, connection: PooledConnection) -> None:
+        # Free the slot first so it is not lost if the quit is cancelled
+        self._slots.release()
+        await self._quit(connection)
+
+    async def _quit(self, connection: PooledConnection) -> None:
+        try:
+            if connection.smtp.is_connected:
+                await connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def _is_transient(self, error: Exception) -> bool:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        return isinstance(error, aiosmtplib.SMTPResponseException) and 400 <= error.code < 500
+
+mail_transport = MailTransport()
@@ -0,0 +1,105 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+from .inference_executor import inference_executor
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Coalesces concurrent single-input calls to a pipeline into batched calls.
+
+    Inputs awaiting ``run`` are collected until ``max_batch_size`` items arrive
+    or ``max_wait`` seconds pass since the first one, then passed to the
+    pipeline as one list on the inference executor. Each caller gets back the
+    same result shape as calling the pipeline with its input alone.
+    """
+
+    def __init__(
+        self,
+        model: Callable[..., Any],
+        max_batch_size: int = int(os.getenv("BATCH_SIZE", 32)),
+        max_wait: float = float(os.getenv("BATCH_WAIT_MS", 10)) / 1000,
+        **call_kwargs
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.call_kwargs = call_kwargs
+        self.pending: List[Tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Running batches, referenced so they are not garbage-collected mid-run
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def run(self, item: Any) -> Any:
+        """Queue one input for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future))
+
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def __call__(self, *args, **kwargs):
+        """Call the pipeline directly, outside any batch."""
+        return self.model(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.model, name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe the batching configuration and queue."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait': self.max_wait,
+            'pending': len(self.pending)
+        }
+
+    def _flush(self) -> None:
+        """Hand the pending inputs to a batch run."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Run one batched forward pass and fan the results back out."""
+        inputs = [item for item, _ in batch]
+        try:
+            results = await inference_executor.run(
+                self.model,
+                inputs,
+                batch_size=len(inputs),
+                **self.call_kwargs
+            )
+        except Exception as e:
+            logger.error(f"Batched inference of {len(inputs)} inputs failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            error = RuntimeError(
+                f"Batched inference returned {len(results)} results for {len(inputs)} inputs"
+            )
+            logger.error(str(error))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                # List inputs yield a bare result per item for some tasks;
+                # single calls always return a list
+                future.set_result(result if isinstance(result, list) else [result])
@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, Iterator
+import asyncio
+import threading
+import logging
+import time
+import gc
+import os
+from .inference_executor import inference_executor
+from .micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, Optional[str], Tuple[Tuple[str, str], ...]]
+
+class ModelRegistry:
+    """Process-wide registry of Hugging Face pipelines and models.
+
+    Services hold lightweight proxies; the underlying model is loaded on first
+    use and shared by every proxy with the same (task, model, options). When
+    the estimated size of loaded models exceeds the memory budget, the least
+    recently used models that are not currently running are unloaded, as are
+    models left idle for longer than the idle timeout.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", 0)),
+        idle_timeout: int = int(os.getenv("MODEL_IDLE_TIMEOUT", 0))
+    ):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self.models: "OrderedDict[ModelKey, Dict[str, Any]]" = OrderedDict()
+        self.load_locks: Dict[ModelKey, threading.Lock] = {}
+        self.batchers: Dict[Tuple[ModelKey, Tuple[Tuple[str, str], ...]], MicroBatcher] = {}
+        self.lock = threading.Lock()
+
+    def pipeline(self, task: str, model: Optional[str] = None, **kwargs) -> "LazyModel":
+        """Get a lazy proxy for ``transformers.pipeline(task, model, **kwargs)``."""
+        return LazyModel(self, self._key("pipeline", task, model, kwargs), kwargs)
+
+    def auto_model(self, model: str, **kwargs) -> "LazyModel":
+        """Get a lazy proxy for ``transformers.AutoModel.from_pretrained(model, **kwargs)``."""
+        return LazyModel(self, self._key("auto_model", "", model, kwargs), kwargs)
+
+    def batcher(self, model: "LazyModel", **call_kwargs) -> MicroBatcher:
+        """Get the shared micro-batcher for a model and call options."""
+        key = (model._key, tuple(sorted((name, repr(value)) for name, value in call_kwargs.items())))
+        with self.lock:
+            if key not in self.batchers:
+                self.batchers[key] = MicroBatcher(model, **call_kwargs)
+            return self.batchers[key]
+
+    def load(self, key: ModelKey, options: Dict[str, Any]) -> Any:
+        """Get a loaded model, loading it once even under concurrent first use."""
+        with self.lock:
+            entry = self.models.get(key)
+            if entry:
+                self.models.move_to_end(key)
+                entry['last_used'] = time.monotonic()
+                return entry['model']
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self.lock:
+                entry = self.models.get(key)
+                if entry:
+                    return entry['model']
+
+            kind, task, name, _ = key
+            logger.info(f"Loading {kind} {task or name} ({name or 'default model'})")
+            model = self._construct(kind, task, name, options)
+            size = self._estimate_size(model)
+
+            with self.lock:
+                self.models[key] = {
+                    'model': model,
+                    'size': size,
+                    'in_use': 0,
+                    'last_used': time.monotonic()
+                }
+                self._evict(keep=key)
+            return model
+
+    @contextmanager
+    def use(self, key: ModelKey, options: Dict[str, Any]) -> Iterator[Any]:
+        """Hold a model for the duration of a call so it is not evicted mid-run."""
+        model = self.load(key, options)
+        with self.lock:
+            entry = self.models.get(key)
+            if entry:
+                entry['in_use'] += 1
+        try:
+            yield model
+        finally:
+            with self.lock:
+                entry = self.models.get(key)
+                if entry:
+                    entry['in_use'] -= 1
+                    entry['last_used'] = time.monotonic()
+                self._evict()
+
+    def unload(self, key: ModelKey) -> bool:
+        """Unload a model if it is not currently running."""
+        with self.lock:
+            entry = self.models.get(key)
+            if not entry or entry['in_use']:
+                return False
+            del self.models[key]
+        self._release_memory()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe the loaded models and their estimated memory use."""
+        with self.lock:
+            return {
+                'memory_budget': self.memory_budget,
+                'memory_used': sum(entry['size'] for entry in self.models.values()),
+                'models': [
+                    {
+                        'kind': key[0],
+                        'task': key[1],
+                        'model': key[2],
+                        'size': entry['size'],
+                        'in_use': entry['in_use']
+                    }
+                    for key, entry in self.models.items()
+                ]
+            }
+
+    def _evict(self, keep: Optional[ModelKey] = None) -> None:
+        """Unload idle and least recently used models; callers hold the lock."""
+        now = time.monotonic()
+        evicted = []
+
+        if self.idle_timeout:
+            for key, entry in list(self.models.items()):
+                if key != keep and not entry['in_use'] and now - entry['last_used'] > self.idle_timeout:
+                    evicted.append(key)
+                    del self.models[key]
+
+        if self.memory_budget:
+            used = sum(entry['size'] for entry in self.models.values())
+            for key, entry in list(self.models.items()):
+                if used <= self.memory_budget:
+                    break
+                if key == keep or entry['in_use']:
+                    continue
+                used -= entry['size']
+                evicted.append(key)
+                del self.models[key]
+
+        if evicted:
+            logger.info(f"Unloaded {len(evicted)} models: {[key[1] or key[2] for key in evicted]}")
+            self._release_memory()
+
+    def _construct(self, kind: str, task: str, name: Optional[str], options: Dict[str, Any]) -> Any:
+        """Build the underlying transformers object."""
+        if kind == "auto_model":
+            from transformers import AutoModel
+            return AutoModel.from_pretrained(name, **options)
+
+        from transformers import pipeline
+        return pipeline(task, model=name, **options)
+
+    def _estimate_size(self, model: Any) -> int:
+        """Estimate a model's memory footprint in bytes from its parameters."""
+        module = getattr(model, 'model', model)
+        try:
+            return sum(
+                parameter.numel() * parameter.element_size()
+                for parameter in module.parameters()
+            )
+        except (AttributeError, TypeError):
+            return 0
+
+    def _release_memory(self) -> None:
+        """Return freed model memory to the allocator."""
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def _key(self, kind: str, task: str, model: Optional[str], options: Dict[str, Any]) -> ModelKey:
+        """Identify a model by everything that affects how it is constructed."""
+        return (kind, task, model, tuple(sorted((name, repr(value)) for name, value in options.items())))
+
+class LazyModel:
+    """Stand-in for a pipeline or model that loads it from the registry on first use."""
+
+    def __init__(self, registry: ModelRegistry, key: ModelKey, options: Dict[str, Any]):
+        self._registry = registry
+        self._key = key
+        self._options = options
+
+    def __call__(self, *args, **kwargs):
+        if _on_event_loop():
+            # Async code should use ``await model.run(...)`` instead
+            logger.warning(f"{self!r} called on the event loop; this blocks every other request")
+        with self._registry.use(self._key, self._options) as model:
+            return model(*args, **kwargs)
+
+    async def run(self, *args, **kwargs):
+        """Call the model on the inference executor without blocking the event loop."""
+        return await inference_executor.run(self, *args, **kwargs)
+
+    def batched(self, **call_kwargs) -> MicroBatcher:
+        """Get a batcher that merges concurrent ``run`` calls into one forward pass.
+
+        Batchers are shared across every proxy of the same model, so services
+        using the same default pipeline fill the same batches.
+        """
+        return self._registry.batcher(self, **call_kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._registry.load(self._key, self._options), name)
+
+    def __repr__(self) -> str:
+        kind, task, model, _ = self._key
+        return f"LazyModel({kind}, {task or model!r}, model={model!r})"
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+model_registry = ModelRegistry()
+
+def pipeline(task: str, model: Optional[str] = None, **kwargs) -> LazyModel:
+    """Drop-in replacement for ``transformers.pipeline`` that loads lazily and shares models."""
+    return model_registry.pipeline(task, model, **kwargs)
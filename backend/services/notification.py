@@ -1,18 +1,18 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy import insert
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from fastapi import HTTPException
 from ..models.notification import (
-    Notification, NotificationPreference,
+    Notification, NotificationPreference, NotificationDelivery, DeliveryChannel,
     NotificationType, NotificationPriority, NotificationStatus
 )
-from ..schemas.notification import NotificationCreate, NotificationUpdate, NotificationPreferenceCreate
-from ..websocket_manager import manager
+from ..schemas.notification import (
+    NotificationCreate, NotificationUpdate, NotificationPreferenceCreate, NotificationPreferenceUpdate
+)
+from .notification_dispatcher import notification_dispatcher
+from .preference_cache import preference_cache, CachedPreference
 import logging
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
 
 logger = logging.getLogger(__name__)
 
@@ -23,106 +23,111 @@ class NotificationService:
     async def create_notification(
         self,
         notification: NotificationCreate,
-        check_preferences: bool = True
+        check_preferences: bool = True,
+        preferences: Optional[Dict[Tuple[int, NotificationType], Optional[CachedPreference]]] = None
     ) -> Notification:
-        """Create a new notification and send it through appropriate channels."""
+        """Create a new notification and queue it on the channels the user enabled.
+
+        The notification and its per-channel delivery rows are committed
+        together; ``notification_dispatcher`` sends them in the background.
+        ``preferences`` is an optional result of ``preference_cache.get_many``
+        for callers that create many notifications; other keys are looked up.
+        """
+        key = (notification.user_id, NotificationType(notification.type))
+        if preferences is not None and key in preferences:
+            preference = preferences[key]
+        else:
+            preference = self.get_user_preference(*key)
         if check_preferences:
             # Check user preferences
-            preference = self.get_user_preference(
-                notification.user_id,
-                notification.type
-            )
             if not preference or notification.priority.value < preference.minimum_priority.value:
                 return None
 
         # Create notification record
         db_notification = Notification(**notification.dict())
+        db_notification.deliveries = [
+            NotificationDelivery(channel=channel)
+            for channel in self._channels(preference)
+        ]
         self.db.add(db_notification)
         self.db.commit()
         self.db.refresh(db_notification)
 
-        # Send through appropriate channels based on preferences
-        if preference:
-            await self._send_notification(db_notification, preference)
-
+        notification_dispatcher.wake()
         return db_notification
 
-    async def _send_notification(
+    def create_notifications(
         self,
-        notification: Notification,
-        preference: NotificationPreference
-    ) -> None:
-        """Send notification through configured channels."""
-        tasks = []
+        notifications: List[NotificationCreate],
+        check_preferences: bool = True,
+        chunk_size: int = 500
+    ) -> int:
+        """Create many notifications with bulk inserts, committing once per chunk.
 
-        # WebSocket notification
-        if preference.websocket_enabled:
-            await self._send_websocket_notification(notification)
-
-        # Email notification
-        if preference.email_enabled:
-            await self._send_email_notification(notification)
+        Preferences are resolved with ``preference_cache.get_many`` and each
+        chunk writes its notifications and their delivery rows in two
+        statements (on MySQL, which has no multi-row RETURNING, the
+        notifications are flushed as ORM objects to learn their ids). Blocking; callers run it off the event loop and then
+        call ``notification_dispatcher.wake()`` once. Returns how many
+        notifications were created.
+        """
+        preferences = preference_cache.get_many(
+            self.db,
+            [(notification.user_id, notification.type) for notification in notifications]
+        )
 
-        # Push notification (if implemented)
-        if preference.push_enabled:
-            await self._send_push_notification(notification)
-
-    async def _send_websocket_notification(self, notification: Notification) -> None:
-        """Send notification via WebSocket."""
-        message = {
-            "type": "NOTIFICATION",
-            "data": {
-                "id": notification.id,
-                "type": notification.type,
-                "priority": notification.priority,
-                "title": notification.title,
-                "message": notification.message,
-                "data": notification.data,
-                "created_at": notification.created_at.isoformat()
-            }
-        }
-        await manager.send_personal_message(message, notification.user_id)
+        accepted = []
+        for notification in notifications:
+            preference = preferences[(notification.user_id, NotificationType(notification.type))]
+            if check_preferences and (
+                not preference or notification.priority.value < preference.minimum_priority.value
+            ):
+                continue
+            accepted.append((notification, preference))
 
-    async def _send_email_notification(self, notification: Notification) -> None:
-        """Send notification via email."""
-        try:
-            # Get user email from database
-            user = self.db.query(User).filter(User.id == notification.user_id).first()
-            if not user or not user.email:
-                return
+        # MySQL cannot return ids from a multi-row insert
+        returning = self.db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order
 
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = os.getenv("EMAIL_FROM")
-            msg['To'] = user.email
-            msg['Subject'] = notification.title
+        for offset in range(0, len(accepted), chunk_size):
+            chunk = accepted[offset:offset + chunk_size]
+            try:
+                if returning:
+                    ids = self.db.execute(
+                        insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+                        [notification.dict() for notification, _ in chunk]
+                    ).scalars().all()
+                else:
+                    rows = [Notification(**notification.dict()) for notification, _ in chunk]
+                    self.db.add_all(rows)
+                    self.db.flush()
+                    ids = [row.id for row in rows]
+                deliveries = [
+                    {"notification_id": notification_id, "channel": channel}
+                    for notification_id, (_, preference) in zip(ids, chunk)
+                    for channel in self._channels(preference)
+                ]
+                if deliveries:
+                    self.db.execute(insert(NotificationDelivery), deliveries)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
 
-            # Create HTML body
-            html = f"""
-            <html>
-                <body>
-                    <h2>{notification.title}</h2>
-                    <p>{notification.message}</p>
-                    <hr>
-                    <p><small>This is an automated notification from AI Support App</small></p>
-                </body>
-            </html>
-            """
-            msg.attach(MIMEText(html, 'html'))
+        return len(accepted)
 
-            # Send email
-            with smtplib.SMTP(os.getenv("SMTP_SERVER"), int(os.getenv("SMTP_PORT"))) as server:
-                server.starttls()
-                server.login(os.getenv("SMTP_USERNAME"), os.getenv("SMTP_PASSWORD"))
-                server.send_message(msg)
+    def _channels(self, preference: Optional[CachedPreference]) -> List[DeliveryChannel]:
+        """Channels to deliver on; in-app only when the user has no preference."""
+        if not preference:
+            return [DeliveryChannel.WEBSOCKET]
 
-        except Exception as e:
-            logger.error(f"Failed to send email notification: {str(e)}")
-
-    async def _send_push_notification(self, notification: Notification) -> None:
-        """Send push notification (placeholder for future implementation)."""
-        # Implement push notification service integration here
-        pass
+        channels = []
+        if preference.websocket_enabled:
+            channels.append(DeliveryChannel.WEBSOCKET)
+        if preference.email_enabled:
+            channels.append(DeliveryChannel.EMAIL)
+        if preference.push_enabled:
+            channels.append(DeliveryChannel.PUSH)
+        return channels
 
     def get_user_notifications(
         self,
@@ -165,12 +170,15 @@ class NotificationService:
         self,
         user_id: int,
         notification_type: NotificationType
-    ) -> Optional[NotificationPreference]:
+    ) -> Optional[CachedPreference]:
         """Get user's preference for a specific notification type."""
+        return preference_cache.get(self.db, user_id, notification_type)
+
+    def get_user_preferences(self, user_id: int) -> List[NotificationPreference]:
+        """Get all of a user's notification preferences."""
         return self.db.query(NotificationPreference).filter(
-            NotificationPreference.user_id == user_id,
-            NotificationPreference.notification_type == notification_type
-        ).first()
+            NotificationPreference.user_id == user_id
+        ).all()
 
     def set_user_preference(
         self,
@@ -178,7 +186,10 @@ class NotificationService:
         preference: NotificationPreferenceCreate
     ) -> NotificationPreference:
         """Set user's preference for a notification type."""
-        existing = self.get_user_preference(user_id, preference.notification_type)
+        existing = self.db.query(NotificationPreference).filter(
+            NotificationPreference.user_id == user_id,
+            NotificationPreference.notification_type == preference.notification_type
+        ).first()
         
         if existing:
             # Update existing preference
@@ -192,8 +203,43 @@ class NotificationService:
         
         self.db.commit()
         self.db.refresh(db_preference)
+        preference_cache.set(db_preference)
         return db_preference
 
+    def update_preference(
+        self,
+        preference_id: int,
+        user_id: int,
+        updates: NotificationPreferenceUpdate
+    ) -> NotificationPreference:
+        """Update a notification preference."""
+        preference = self._get_preference(preference_id, user_id)
+        for field, value in updates.dict(exclude_unset=True).items():
+            setattr(preference, field, value)
+
+        self.db.commit()
+        self.db.refresh(preference)
+        preference_cache.set(preference)
+        return preference
+
+    def delete_preference(self, preference_id: int, user_id: int) -> None:
+        """Delete a notification preference."""
+        preference = self._get_preference(preference_id, user_id)
+        notification_type = preference.notification_type
+        self.db.delete(preference)
+        self.db.commit()
+        preference_cache.invalidate(user_id, notification_type)
+
+    def _get_preference(self, preference_id: int, user_id: int) -> NotificationPreference:
+        preference = self.db.query(NotificationPreference).filter(
+            NotificationPreference.id == preference_id,
+            NotificationPreference.user_id == user_id
+        ).first()
+
+        if not preference:
+            raise HTTPException(status_code=404, detail="Notification preference not found")
+        return preference
+
     def delete_notification(self, notification_id: int, user_id: int) -> None:
         """Delete a notification."""
         notification = self.db.query(Notification).filter(
@@ -258,15 +304,23 @@ class NotificationService:
                 }
             ))
 
-    async def create_recurring_transaction_notification(
+    def recurring_transactions_notification(self, user_id: int, items: List[Dict[str, Any]]) -> NotificationCreate:
+        """Build a user's notification for a recurring-transaction run, summarizing when there are several."""
+        if len(items) == 1 and items[0]['occurrences'] == 1:
+            item = items[0]
+            return self._recurring_transaction_notification(
+                user_id, item['type'], item['amount'], item['description']
+            )
+        return self._recurring_transactions_summary_notification(user_id, items)
+
+    def _recurring_transaction_notification(
         self,
         user_id: int,
         transaction_type: str,
         amount: float,
         description: str
-    ) -> None:
-        """Create a notification for a recurring transaction."""
-        await self.create_notification(NotificationCreate(
+    ) -> NotificationCreate:
+        return NotificationCreate(
             user_id=user_id,
             type=NotificationType.RECURRING_TRANSACTION,
             priority=NotificationPriority.LOW,
@@ -277,7 +331,25 @@ class NotificationService:
                 "amount": amount,
                 "description": description
             }
-        ))
+        )
+
+    def _recurring_transactions_summary_notification(
+        self,
+        user_id: int,
+        items: List[Dict[str, Any]]
+    ) -> NotificationCreate:
+        count = sum(item['occurrences'] for item in items)
+        return NotificationCreate(
+            user_id=user_id,
+            type=NotificationType.RECURRING_TRANSACTION,
+            priority=NotificationPriority.LOW,
+            title="Recurring Transactions Processed",
+            message=f"{count} recurring transactions have been processed",
+            data={
+                "count": count,
+                "transactions": items
+            }
+        )
 
     async def create_financial_health_alert(
         self,
@@ -0,0 +1,311 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import joinedload
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import logging
+import os
+from ..database import SessionLocal
+from ..models.user import User
+from ..models.notification import NotificationDelivery, DeliveryChannel, DeliveryStatus, NotificationPriority
+from ..websocket_manager import manager
+from .mail_transport import mail_transport, build_message
+
+logger = logging.getLogger(__name__)
+
+class NotificationDispatcher:
+    """Delivers notification outbox rows in the background.
+
+    ``NotificationService`` commits each notification together with one
+    ``NotificationDelivery`` row per channel, so nothing is lost if the process
+    dies before sending. The dispatcher claims due rows in batches, delivers
+    them concurrently across channels, and records the outcome: delivered rows
+    get their latency from creation, failed rows are retried with exponential
+    backoff until ``max_attempts``. Rows left in ``sending`` by a crashed
+    worker are reclaimed after ``lease``, which makes delivery at-least-once.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = int(os.getenv("NOTIFICATION_DISPATCH_CONCURRENCY", 20)),
+        batch_size: int = int(os.getenv("NOTIFICATION_DISPATCH_BATCH", 100)),
+        max_attempts: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 5)),
+        backoff: float = 2.0,
+        poll_interval: float = 5.0,
+        lease: timedelta = timedelta(minutes=5)
+    ):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.latencies: Dict[DeliveryChannel, deque] = {
+            channel: deque(maxlen=1000) for channel in DeliveryChannel
+        }
+        self.counts = {"delivered": 0, "retried": 0, "failed": 0}
+
+    def start(self) -> None:
+        """Start the dispatch loop on the running event loop."""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def wake(self) -> None:
+        """Dispatch new outbox rows now instead of at the next poll."""
+        self._event().set()
+
+    async def dispatch_pending(self) -> int:
+        """Claim and deliver one batch of due rows; returns how many were claimed."""
+        deliveries = await run_in_threadpool(self.claim)
+        if not deliveries:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(delivery: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    await self.SENDERS[delivery["channel"]](self, delivery)
+                    return {**delivery, "error": None}
+                except Exception as e:
+                    logger.error(
+                        f"Error delivering notification {delivery['notification_id']} "
+                        f"via {delivery['channel'].value}: {str(e)}"
+                    )
+                    return {**delivery, "error": str(e)}
+
+        push = [delivery for delivery in deliveries if delivery["channel"] == DeliveryChannel.PUSH]
+        others = [delivery for delivery in deliveries if delivery["channel"] != DeliveryChannel.PUSH]
+        results, push_results = await asyncio.gather(
+            asyncio.gather(*(deliver(delivery) for delivery in others)),
+            self._deliver_push(push)
+        )
+        await run_in_threadpool(self.record, list(results) + push_results)
+        return len(deliveries)
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """Mark a batch of due rows as sending and load what delivering them needs."""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = db.query(NotificationDelivery).options(
+                joinedload(NotificationDelivery.notification)
+            ).filter(
+                or_(
+                    and_(
+                        NotificationDelivery.status == DeliveryStatus.PENDING,
+                        NotificationDelivery.next_attempt_at <= now
+                    ),
+                    and_(
+                        NotificationDelivery.status == DeliveryStatus.SENDING,
+                        NotificationDelivery.claimed_at < now - self.lease
+                    )
+                )
+            ).order_by(NotificationDelivery.id).limit(self.batch_size).with_for_update(
+                skip_locked=True, of=NotificationDelivery
+            ).all()
+
+            if not rows:
+                db.rollback()
+                return []
+
+            user_ids = {row.notification.user_id for row in rows if row.channel == DeliveryChannel.EMAIL}
+            emails = dict(
+                db.query(User.id, User.email).filter(User.id.in_(user_ids)).all()
+            ) if user_ids else {}
+
+            deliveries = []
+            for row in rows:
+                notification = row.notification
+                row.status = DeliveryStatus.SENDING
+                row.claimed_at = now
+                deliveries.append({
+                    "id": row.id,
+                    "notification_id": notification.id,
+                    "channel": row.channel,
+                    "attempts": row.attempts,
+                    "created_at": row.created_at,
+                    "user_id": notification.user_id,
+                    "email": emails.get(notification.user_id),
+                    "message": {
+                        "id": notification.id,
+                        "type": notification.type,
+                        "priority": notification.priority,
+                        "title": notification.title,
+                        "message": notification.message,
+                        "data": notification.data,
+                        "created_at": notification.created_at.isoformat()
+                    }
+                })
+            db.commit()
+            return deliveries
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def record(self, results: List[Dict[str, Any]]) -> None:
+        """Store delivery outcomes and schedule retries."""
+        now = datetime.utcnow()
+        updates = []
+        for result in results:
+            attempts = result["attempts"] + 1
+            if result["error"] is None:
+                latency = (now - result["created_at"]).total_seconds() * 1000
+                self.latencies[result["channel"]].append(latency)
+                self.counts["delivered"] += 1
+                updates.append({
+                    "id": result["id"],
+                    "status": DeliveryStatus.DELIVERED,
+                    "attempts": attempts,
+                    "delivered_at": now,
+                    "latency_ms": latency,
+                    "last_error": None
+                })
+            elif attempts >= self.max_attempts:
+                self.counts["failed"] += 1
+                updates.append({
+                    "id": result["id"],
+                    "status": DeliveryStatus.FAILED,
+                    "attempts": attempts,
+                    "last_error": result["error"]
+                })
+            else:
+                self.counts["retried"] += 1
+                updates.append({
+                    "id": result["id"],
+                    "status": DeliveryStatus.PENDING,
+                    "attempts": attempts,
+                    "next_attempt_at": now + timedelta(seconds=self.backoff * 2 ** attempts),
+                    "last_error": result["error"]
+                })
+
+        db = SessionLocal()
+        try:
+            db.bulk_update_mappings(NotificationDelivery, updates)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error recording notification deliveries: {str(e)}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counts and recent per-channel latency in milliseconds."""
+        latency = {}
+        for channel, values in self.latencies.items():
+            if values:
+                ordered = sorted(values)
+                latency[channel.value] = {
+                    "avg": sum(ordered) / len(ordered),
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                }
+        return {**self.counts, "latency_ms": latency}
+
+    async def _send_websocket(self, delivery: Dict[str, Any]) -> None:
+        await manager.send_personal_message(
+            {"type": "NOTIFICATION", "data": delivery["message"]},
+            delivery["user_id"]
+        )
+
+    async def _send_email(self, delivery: Dict[str, Any]) -> None:
+        if not delivery["email"]:
+            return
+
+        message = delivery["message"]
+        html = f"""
+        <html>
+            <body>
+                <h2>{message['title']}</h2>
+                <p>{message['message']}</p>
+                <hr>
+                <p><small>This is an automated notification from AI Support App</small></p>
+            </body>
+        </html>
+        """
+        await mail_transport.send(build_message(delivery["email"], message["title"], html))
+
+    async def _deliver_push(self, deliveries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send a batch's push rows with one batched multicast call.
+
+        Each row gets its own notification's outcome, so only rows whose
+        message reached none of the user's devices are retried. A user with no
+        active devices has nothing to retry and counts as delivered.
+        """
+        if not deliveries:
+            return []
+
+        # Imported here so Firebase and its settings are only needed once push rows exist
+        from .push_notification import PushNotificationService
+
+        db = SessionLocal()
+        try:
+            result = await PushNotificationService(db).send_push_notifications(
+                [
+                    {
+                        "user_id": delivery["user_id"],
+                        "title": delivery["message"]["title"],
+                        "body": delivery["message"]["message"],
+                        # No per-row ids, so identical messages share multicast requests
+                        "data": {"type": delivery["message"]["type"].value},
+                        "notification_type": delivery["message"]["type"],
+                        "priority": "high" if delivery["message"]["priority"] == NotificationPriority.HIGH else "normal"
+                    }
+                    for delivery in deliveries
+                ],
+                # Channels were chosen from preferences when the rows were created
+                check_preferences=False
+            )
+            errors = result["errors"]
+        except Exception as e:
+            # Raised before anything was sent, so every row can be retried
+            logger.error(f"Error delivering {len(deliveries)} push notifications: {str(e)}")
+            errors = [str(e)] * len(deliveries)
+        finally:
+            db.close()
+
+        return [{**delivery, "error": error} for delivery, error in zip(deliveries, errors)]
+
+    SENDERS = {
+        DeliveryChannel.WEBSOCKET: _send_websocket,
+        DeliveryChannel.EMAIL: _send_email
+    }
+
+    async def _run(self) -> None:
+        """Dispatch until stopped, waiting for a wake-up or the poll interval between batches."""
+        while True:
+            try:
+                while await self.dispatch_pending() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification dispatch error: {str(e)}")
+
+            event = self._event()
+            try:
+                await asyncio.wait_for(event.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+notification_dispatcher = NotificationDispatcher()
@@ -4,7 +4,6 @@ from datetime import datetime, timedelta
 import asyncio
 import torch
 import tensorflow as tf
-from transformers import pipeline, AutoModel, AutoTokenizer
 import openai
 import numpy as np
 import pandas as pd
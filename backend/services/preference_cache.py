@@ -0,0 +1,108 @@
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy.orm import Session
+import threading
+import time
+import os
+from ..models.notification import NotificationPreference, NotificationType
+
+# Read-only copy of a preference row that is safe to share across sessions
+CachedPreference = namedtuple("CachedPreference", [
+    "id", "user_id", "notification_type",
+    "email_enabled", "push_enabled", "websocket_enabled", "minimum_priority"
+])
+
+Key = Tuple[int, NotificationType]
+
+def snapshot(preference: NotificationPreference) -> CachedPreference:
+    return CachedPreference(
+        preference.id,
+        preference.user_id,
+        NotificationType(preference.notification_type),
+        preference.email_enabled,
+        preference.push_enabled,
+        preference.websocket_enabled,
+        preference.minimum_priority
+    )
+
+class PreferenceCache:
+    """In-process cache of notification preferences keyed by (user_id, type).
+
+    Missing preferences are cached too, since "no preference" is the common
+    answer for most types. NotificationService writes changes through to the
+    cache; the TTL bounds staleness from writes made by other processes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = int(os.getenv("PREFERENCE_CACHE_SIZE", 10000)),
+        ttl: int = int(os.getenv("PREFERENCE_CACHE_TTL", 300)),
+        chunk_size: int = 500
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self.entries: "OrderedDict[Key, Tuple[Optional[CachedPreference], float]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int, notification_type: NotificationType) -> Optional[CachedPreference]:
+        """Get one preference, querying only on a miss."""
+        return self.get_many(db, [(user_id, notification_type)])[(user_id, NotificationType(notification_type))]
+
+    def get_many(self, db: Session, keys: Iterable[Key]) -> Dict[Key, Optional[CachedPreference]]:
+        """Get many preferences, loading misses with one query per ``chunk_size`` users."""
+        keys = {(user_id, NotificationType(notification_type)) for user_id, notification_type in keys}
+        now = time.time()
+        found: Dict[Key, Optional[CachedPreference]] = {}
+
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry and entry[1] > now:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[0]
+
+        missing = keys - found.keys()
+        if missing:
+            loaded = {key: None for key in missing}
+            user_ids = sorted({user_id for user_id, _ in missing})
+            types = {notification_type for _, notification_type in missing}
+            # Chunked so large scheduled jobs stay under bind-parameter limits
+            for offset in range(0, len(user_ids), self.chunk_size):
+                rows = db.query(NotificationPreference).filter(
+                    NotificationPreference.user_id.in_(user_ids[offset:offset + self.chunk_size]),
+                    NotificationPreference.notification_type.in_(types)
+                ).all()
+                for row in rows:
+                    preference = snapshot(row)
+                    key = (preference.user_id, preference.notification_type)
+                    if key in loaded:
+                        loaded[key] = preference
+            self._store(loaded, now)
+            found.update(loaded)
+
+        return found
+
+    def set(self, preference: NotificationPreference) -> None:
+        """Write a saved preference through to the cache."""
+        cached = snapshot(preference)
+        self._store({(cached.user_id, cached.notification_type): cached}, time.time())
+
+    def invalidate(self, user_id: int, notification_type: Optional[NotificationType] = None) -> None:
+        """Drop one of a user's cached preferences, or all of them."""
+        with self.lock:
+            if notification_type is not None:
+                self.entries.pop((user_id, NotificationType(notification_type)), None)
+                return
+            for key in [key for key in self.entries if key[0] == user_id]:
+                del self.entries[key]
+
+    def _store(self, values: Dict[Key, Optional[CachedPreference]], now: float) -> None:
+        with self.lock:
+            for key, value in values.items():
+                self.entries[key] = (value, now + self.ttl)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+preference_cache = PreferenceCache()
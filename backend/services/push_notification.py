@@ -1,20 +1,48 @@
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import asyncio
 import json
+import os
 import firebase_admin
 from firebase_admin import credentials, messaging
 from sqlalchemy.orm import Session
-from ..models.notification import NotificationPreference, NotificationType
+from ..models.notification import NotificationType
 from ..models.user_device import UserDevice
+from .preference_cache import preference_cache
 from ..core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Most tokens FCM accepts in one multicast request
+MULTICAST_LIMIT = 500
+
+# Errors meaning the token will never work again; other failures are transient
+PERMANENT_TOKEN_ERRORS = (
+    messaging.UnregisteredError,
+    messaging.SenderIdMismatchError
+)
+
+# The Firebase SDK blocks on HTTP, so multicast requests run on this pool
+_send_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PUSH_SEND_WORKERS", 8)),
+    thread_name_prefix="push"
+)
+
 class PushNotificationService:
-    def __init__(self, db: Session):
+    """Sends push notifications to users' registered devices.
+
+    ``messaging_backend`` defaults to the Firebase ``messaging`` module; any
+    object with a compatible ``send_each_for_multicast`` can be passed
+    instead, e.g. a fake in tests.
+    """
+
+    def __init__(self, db: Session, messaging_backend=None):
         self.db = db
-        self._initialize_firebase()
+        self.messaging = messaging_backend or messaging
+        if messaging_backend is None:
+            self._initialize_firebase()
 
     def _initialize_firebase(self):
         """Initialize Firebase Admin SDK if not already initialized."""
@@ -83,69 +111,198 @@ class PushNotificationService:
         priority: str = "normal"
     ):
         """Send push notification to all user's registered devices."""
-        try:
-            # Check user's notification preferences
-            pref = self.db.query(NotificationPreference).filter(
-                NotificationPreference.user_id == user_id,
-                NotificationPreference.notification_type == notification_type
-            ).first()
-
-            if not pref or not pref.push_enabled:
-                return
+        return await self.send_push_notifications([{
+            "user_id": user_id,
+            "title": title,
+            "body": body,
+            "data": data,
+            "notification_type": notification_type,
+            "priority": priority
+        }])
 
-            # Get user's active devices
-            devices = self.db.query(UserDevice).filter(
-                UserDevice.user_id == user_id,
-                UserDevice.is_active == True
-            ).all()
+    async def send_push_notifications(
+        self,
+        notifications: List[Dict[str, Any]],
+        check_preferences: bool = True
+    ) -> Dict[str, Any]:
+        """Send many notifications at once.
 
-            if not devices:
-                return
+        Each notification is a dict of ``send_push_notification`` arguments.
+        Preferences and devices are loaded with one query each, tokens that
+        receive the same message are grouped into multicast requests of up to
+        ``MULTICAST_LIMIT``, the requests run concurrently on a thread pool,
+        and tokens the provider rejected as invalid are deactivated together.
+        Callers that already applied preferences pass ``check_preferences=False``.
 
-            # Prepare notification message
-            message = messaging.MulticastMessage(
-                notification=messaging.Notification(
-                    title=title,
-                    body=body
-                ),
-                data=data or {},
-                tokens=[device.device_token for device in devices],
-                android=messaging.AndroidConfig(
-                    priority=priority,
-                    notification=messaging.AndroidNotification(
-                        icon='notification_icon',
-                        color='#4CAF50',
-                        channel_id='finance_alerts'
-                    )
+        ``errors`` in the result holds one entry per input notification: ``None``
+        once it is done with (sent to at least one device, skipped by
+        preferences, or the user has no active devices), otherwise the error
+        of a device that failed in a way a later retry may fix.
+        """
+        notifications = [
+            {
+                **notification,
+                "notification_type": NotificationType(
+                    notification.get("notification_type", NotificationType.GENERAL)
                 ),
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            sound='default',
-                            badge=1
-                        )
-                    )
-                )
+                "priority": notification.get("priority", "normal")
+            }
+            for notification in notifications
+        ]
+        try:
+            if check_preferences:
+                enabled = self._push_enabled(notifications)
+                selected = [
+                    notification for notification in notifications
+                    if (notification["user_id"], notification["notification_type"]) in enabled
+                ]
+            else:
+                selected = notifications
+            devices = self._active_devices({notification["user_id"] for notification in selected})
+        except Exception as e:
+            logger.error(f"Error loading push notification recipients: {str(e)}")
+            self.db.rollback()
+            raise
+
+        # Group device tokens by identical message content
+        groups: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        keys = []
+        for notification in selected:
+            data = {key: str(value) for key, value in (notification.get("data") or {}).items()}
+            key = (
+                notification["title"],
+                notification["body"],
+                tuple(sorted(data.items())),
+                notification["priority"]
             )
+            keys.append(key)
+            group = groups.setdefault(
+                key, {"notification": {**notification, "data": data}, "users": set(), "devices": []}
+            )
+            # A user listed twice with the same message gets it once
+            if notification["user_id"] not in group["users"]:
+                group["users"].add(notification["user_id"])
+                group["devices"].extend(devices.get(notification["user_id"], []))
+
+        batches = [
+            (key, group["notification"], group["devices"][offset:offset + MULTICAST_LIMIT])
+            for key, group in groups.items()
+            for offset in range(0, len(group["devices"]), MULTICAST_LIMIT)
+        ]
 
-            # Send notification
-            response = messaging.send_multicast(message)
-            
-            # Handle failed tokens
-            if response.failure_count > 0:
-                failed_tokens = []
-                for idx, result in enumerate(response.responses):
-                    if not result.success:
-                        failed_tokens.append(devices[idx].device_token)
-                        # Deactivate failed tokens
-                        devices[idx].is_active = False
-                        devices[idx].error_message = result.exception.cause
+        loop = asyncio.get_running_loop()
+        responses = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    _send_executor,
+                    self.messaging.send_each_for_multicast,
+                    self._build_message(notification, [token for _, token in batch])
+                )
+                for _, notification, batch in batches
+            ),
+            return_exceptions=True
+        )
+
+        result = {
+            "users": len({notification["user_id"] for notification in selected}),
+            "requests": len(batches),
+            "sent": 0,
+            "failed": 0,
+            "deactivated": 0
+        }
+        # Per (message, device) outcome: None when sent, else the failure
+        outcomes: Dict[Tuple[Any, int], Optional[Exception]] = {}
+        invalid = []
+        for (key, _, batch), response in zip(batches, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error sending push notification batch: {str(response)}")
+                result["failed"] += len(batch)
+                for device_id, _ in batch:
+                    outcomes[(key, device_id)] = response
+                continue
+            result["sent"] += response.success_count
+            result["failed"] += response.failure_count
+            for (device_id, _), send_response in zip(batch, response.responses):
+                outcomes[(key, device_id)] = None if send_response.success else send_response.exception
+                if not send_response.success and isinstance(send_response.exception, PERMANENT_TOKEN_ERRORS):
+                    invalid.append({
+                        "id": device_id,
+                        "is_active": False,
+                        "error_message": str(send_response.exception)
+                    })
+
+        errors: Dict[int, Optional[str]] = {}
+        for notification, key in zip(selected, keys):
+            failures = [outcomes[(key, device_id)] for device_id, _ in devices.get(notification["user_id"], [])]
+            retryable = [
+                failure for failure in failures
+                if failure is not None and not isinstance(failure, PERMANENT_TOKEN_ERRORS)
+            ]
+            # Retry only when no device got it, so a retry never repeats a delivery
+            if retryable and None not in failures:
+                errors[id(notification)] = str(retryable[0])
+        result["errors"] = [errors.get(id(notification)) for notification in notifications]
+
+        # Deactivate failed tokens; the sends above already happened either way
+        if invalid:
+            try:
+                self.db.bulk_update_mappings(UserDevice, invalid)
                 self.db.commit()
+                result["deactivated"] = len(invalid)
+            except Exception as e:
+                logger.error(f"Error deactivating push tokens: {str(e)}")
+                self.db.rollback()
 
-            return response
-        except Exception as e:
-            logger.error(f"Error sending push notification: {str(e)}")
-            raise
+        return result
+
+    def _push_enabled(self, notifications: List[Dict[str, Any]]) -> set:
+        """The (user, type) pairs with push enabled, loading uncached preferences in one query."""
+        preferences = preference_cache.get_many(self.db, {
+            (notification["user_id"], notification["notification_type"])
+            for notification in notifications
+        })
+        return {key for key, preference in preferences.items() if preference and preference.push_enabled}
+
+    def _active_devices(self, user_ids: set) -> Dict[int, List[Tuple[int, str]]]:
+        """Each user's active (device id, token) pairs, in one query."""
+        devices: Dict[int, List[Tuple[int, str]]] = {}
+        if not user_ids:
+            return devices
+
+        for device_id, user_id, token in self.db.query(
+            UserDevice.id, UserDevice.user_id, UserDevice.device_token
+        ).filter(
+            UserDevice.user_id.in_(user_ids),
+            UserDevice.is_active == True
+        ):
+            devices.setdefault(user_id, []).append((device_id, token))
+        return devices
+
+    def _build_message(self, notification: Dict[str, Any], tokens: List[str]) -> messaging.MulticastMessage:
+        return messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=notification["title"],
+                body=notification["body"]
+            ),
+            data=notification["data"],
+            tokens=tokens,
+            android=messaging.AndroidConfig(
+                priority=notification["priority"],
+                notification=messaging.AndroidNotification(
+                    icon='notification_icon',
+                    color='#4CAF50',
+                    channel_id='finance_alerts'
+                )
+            ),
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        sound='default',
+                        badge=1
+                    )
+                )
+            )
+        )
 
     async def send_transaction_alert(self, user_id: int, transaction_data: Dict[str, Any]):
         """Send push notification for new transaction."""
@@ -172,50 +329,60 @@ class PushNotificationService:
 
     async def send_budget_alert(self, user_id: int, budget_data: Dict[str, Any]):
         """Send push notification for budget threshold."""
+        await self.send_push_notifications([self._budget_alert(user_id, budget_data)])
+
+    async def send_budget_alerts(self, alerts: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Send budget alerts for many (user_id, budget_data) pairs in one batch."""
+        return await self.send_push_notifications([
+            self._budget_alert(user_id, budget_data) for user_id, budget_data in alerts
+        ])
+
+    def _budget_alert(self, user_id: int, budget_data: Dict[str, Any]) -> Dict[str, Any]:
         category = budget_data['category']
         percentage = budget_data['percentage']
         
-        title = f"Budget Alert: {category}"
-        body = f"You've used {percentage}% of your {category} budget"
-        data = {
-            "type": "budget",
-            "category": category,
-            "percentage": str(percentage)
+        return {
+            "user_id": user_id,
+            "title": f"Budget Alert: {category}",
+            "body": f"You've used {percentage}% of your {category} budget",
+            "data": {
+                "type": "budget",
+                "category": category,
+                "percentage": str(percentage)
+            },
+            "notification_type": NotificationType.BUDGET_ALERT,
+            "priority": "high"
         }
 
-        await self.send_push_notification(
-            user_id,
-            title,
-            body,
-            data,
-            NotificationType.BUDGET_ALERT,
-            "high"
-        )
-
     async def send_bill_reminder(self, user_id: int, bill_data: Dict[str, Any]):
         """Send push notification for upcoming bill."""
+        await self.send_push_notifications([self._bill_reminder(user_id, bill_data)])
+
+    async def send_bill_reminders(self, reminders: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Send bill reminders for many (user_id, bill_data) pairs in one batch."""
+        return await self.send_push_notifications([
+            self._bill_reminder(user_id, bill_data) for user_id, bill_data in reminders
+        ])
+
+    def _bill_reminder(self, user_id: int, bill_data: Dict[str, Any]) -> Dict[str, Any]:
         amount = f"${bill_data['amount']:.2f}"
         due_date = bill_data['due_date'].strftime("%B %d")
         payee = bill_data.get('payee', 'Unknown payee')
         
-        title = f"Upcoming Bill: {amount}"
-        body = f"{payee} payment due on {due_date}"
-        data = {
-            "type": "bill",
-            "bill_id": str(bill_data['id']),
-            "amount": str(bill_data['amount']),
-            "due_date": bill_data['due_date'].isoformat()
+        return {
+            "user_id": user_id,
+            "title": f"Upcoming Bill: {amount}",
+            "body": f"{payee} payment due on {due_date}",
+            "data": {
+                "type": "bill",
+                "bill_id": str(bill_data['id']),
+                "amount": str(bill_data['amount']),
+                "due_date": bill_data['due_date'].isoformat()
+            },
+            "notification_type": NotificationType.BILL_REMINDER,
+            "priority": "normal"
         }
 
-        await self.send_push_notification(
-            user_id,
-            title,
-            body,
-            data,
-            NotificationType.BILL_REMINDER,
-            "normal"
-        )
-
     async def send_savings_milestone(self, user_id: int, goal_data: Dict[str, Any]):
         """Send push notification for savings goal milestone."""
         goal_name = goal_data['name']
@@ -1,33 +1,50 @@
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from ..models.finance import RecurringTransaction, Transaction, RecurrenceInterval
+from typing import List, Optional, Dict, Any, Tuple
+from ..models.finance import (
+    RecurringTransaction, Transaction, RecurrenceInterval, TransactionType, TransactionCategory
+)
 from ..schemas.finance import RecurringTransactionCreate, RecurringTransactionUpdate
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+import logging
 from .notification import NotificationService
+from .transaction_rollup import TransactionRollupService
+from .user_context import user_context_cache
+from .finance_events import finance_events
+from .notification_dispatcher import notification_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on occurrences generated for one schedule per run, so a daily
+# schedule that is years behind cannot produce an unbounded batch; the rest
+# are caught up on the following runs
+MAX_CATCH_UP_OCCURRENCES = 400
 
 class RecurringTransactionService:
     def __init__(self, db: Session):
         self.db = db
         self.notification_service = NotificationService(db)
 
-    def create_recurring_transaction(self, user_id: int, transaction: RecurringTransactionCreate) -> RecurringTransaction:
-        """Create a new recurring transaction."""
-        next_due = self._calculate_next_due(transaction.start_date, transaction.interval)
-        
+    async def create_recurring_transaction(self, user_id: int, transaction: RecurringTransactionCreate) -> RecurringTransaction:
+        """Create a new recurring transaction, notifying the user of any occurrences already due."""
         db_transaction = RecurringTransaction(
             **transaction.dict(),
             user_id=user_id,
-            last_generated=transaction.start_date,
-            next_due=next_due
+            next_due=transaction.start_date
         )
         
         self.db.add(db_transaction)
         self.db.commit()
         self.db.refresh(db_transaction)
         
-        # Generate the first transaction
-        self._generate_transaction(db_transaction)
+        # Generate the first transaction, plus any occurrences already missed
+        # when the start date is in the past
+        if db_transaction.next_due <= datetime.utcnow():
+            generated: Dict[int, List[Dict[str, Any]]] = {}
+            self._process_batch([db_transaction], datetime.utcnow(), generated)
+            self.db.refresh(db_transaction)
+            await self.notify_generated(generated)
         
         return db_transaction
 
@@ -78,55 +95,168 @@ class RecurringTransactionService:
             RecurringTransaction.is_active == True
         ).all()
 
-    def process_due_transactions(self) -> None:
-        """Process all due recurring transactions."""
-        now = datetime.utcnow()
-        due_transactions = self.db.query(RecurringTransaction).filter(
-            RecurringTransaction.is_active == True,
-            RecurringTransaction.next_due <= now,
-            (RecurringTransaction.end_date.is_(None) | (RecurringTransaction.end_date >= now))
-        ).all()
+    def process_due_transactions(
+        self,
+        now: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Generate every due occurrence of every active schedule.
 
-        for transaction in due_transactions:
-            self._generate_transaction(transaction)
-            
-            # Update next_due date
-            transaction.last_generated = now
-            transaction.next_due = self._calculate_next_due(now, transaction.interval)
-            
-            # Check if we've reached the end date
-            if transaction.end_date and transaction.next_due > transaction.end_date:
-                transaction.is_active = False
-        
-        self.db.commit()
+        Schedules are scanned in id order in batches. Each batch inserts its
+        generated transactions in bulk, advances ``next_due`` past all caught-up
+        occurrences and commits once. Returns what was generated per user for
+        ``notify_generated``.
+        """
+        now = now or datetime.utcnow()
+        generated: Dict[int, List[Dict[str, Any]]] = {}
+        last_id = 0
 
-    async def _generate_transaction(self, recurring_transaction: RecurringTransaction) -> Transaction:
-        """Generate a new transaction from a recurring transaction."""
-        transaction = Transaction(
-            user_id=recurring_transaction.user_id,
-            type=recurring_transaction.type,
-            category=recurring_transaction.category,
-            amount=recurring_transaction.amount,
-            description=recurring_transaction.description,
-            date=datetime.utcnow(),
-            recurring_source_id=recurring_transaction.id
-        )
-        
-        self.db.add(transaction)
-        self.db.commit()
+        while True:
+            schedules = self.db.query(
+                RecurringTransaction.id,
+                RecurringTransaction.user_id,
+                RecurringTransaction.type,
+                RecurringTransaction.category,
+                RecurringTransaction.amount,
+                RecurringTransaction.description,
+                RecurringTransaction.interval,
+                RecurringTransaction.start_date,
+                RecurringTransaction.end_date,
+                RecurringTransaction.last_generated,
+                RecurringTransaction.next_due
+            ).filter(
+                RecurringTransaction.is_active == True,
+                RecurringTransaction.next_due <= now,
+                RecurringTransaction.id > last_id
+            ).order_by(RecurringTransaction.id).limit(batch_size).all()
 
-        # Send notification
-        await self.notification_service.create_recurring_transaction_notification(
-            user_id=recurring_transaction.user_id,
-            transaction_type=recurring_transaction.type,
-            amount=recurring_transaction.amount,
-            description=recurring_transaction.description
-        )
+            if not schedules:
+                break
+            last_id = schedules[-1].id
+            self._process_batch(schedules, now, generated)
 
-        return transaction
+        return generated
+
+    async def notify_generated(self, generated: Dict[int, List[Dict[str, Any]]]) -> None:
+        """Queue one notification and send one finance update per user after a run.
+
+        Notifications are written with bulk inserts off the event loop, and
+        the dispatcher is woken once to deliver them all.
+        """
+        notifications = [
+            self.notification_service.recurring_transactions_notification(user_id, items)
+            for user_id, items in generated.items()
+        ]
+        try:
+            created = await run_in_threadpool(self.notification_service.create_notifications, notifications)
+            if created:
+                notification_dispatcher.wake()
+        except Exception as e:
+            logger.error(f"Error notifying users of recurring transactions: {str(e)}")
+
+        for user_id, items in generated.items():
+            finance_events.record(
+                user_id,
+                "transactions",
+                "generated",
+                {"count": sum(item['occurrences'] for item in items)}
+            )
+
+    def _process_batch(
+        self,
+        schedules: List[Any],
+        now: datetime,
+        generated: Dict[int, List[Dict[str, Any]]]
+    ) -> None:
+        """Generate and store the due occurrences of a batch of schedules in one commit."""
+        transactions = []
+        updates = []
+        summaries = []
+
+        for schedule in schedules:
+            try:
+                transaction_type = TransactionType(schedule.type)
+                category = TransactionCategory(schedule.category)
+            except ValueError:
+                logger.error(f"Skipping recurring transaction {schedule.id} with invalid type or category")
+                continue
+
+            occurrences, next_due = self._due_occurrences(schedule, now)
+            transactions.extend(
+                {
+                    'user_id': schedule.user_id,
+                    'type': transaction_type,
+                    'category': category,
+                    'amount': schedule.amount,
+                    'description': schedule.description,
+                    'date': date,
+                    'recurring_source_id': schedule.id,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for date in occurrences
+            )
+            updates.append({
+                'id': schedule.id,
+                'next_due': next_due,
+                'last_generated': occurrences[-1] if occurrences else schedule.last_generated,
+                # Check if we've reached the end date
+                'is_active': not (schedule.end_date and next_due > schedule.end_date),
+                'updated_at': now
+            })
+            if occurrences:
+                summaries.append((schedule, len(occurrences)))
+
+        try:
+            for offset in range(0, len(transactions), 1000):
+                self.db.bulk_insert_mappings(Transaction, transactions[offset:offset + 1000])
+            TransactionRollupService(self.db).record_snapshots(transactions)
+            self.db.bulk_update_mappings(RecurringTransaction, updates)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        for schedule, count in summaries:
+            generated.setdefault(schedule.user_id, []).append({
+                'recurring_transaction_id': schedule.id,
+                'type': schedule.type,
+                'amount': schedule.amount,
+                'description': schedule.description,
+                'occurrences': count
+            })
+            # Bulk inserts skip the ORM events that keep the AI context fresh
+            user_context_cache.invalidate(schedule.user_id, ('financial_context',))
+
+    def _due_occurrences(self, schedule: Any, now: datetime) -> Tuple[List[datetime], datetime]:
+        """List a schedule's occurrences up to now and the due date that follows them."""
+        occurrences = []
+        due = schedule.next_due
+        anchor_day = schedule.start_date.day if schedule.start_date else None
+
+        while (
+            due <= now
+            and (schedule.end_date is None or due <= schedule.end_date)
+            and len(occurrences) < MAX_CATCH_UP_OCCURRENCES
+        ):
+            occurrences.append(due)
+            due = self._calculate_next_due(due, schedule.interval, anchor_day)
+
+        return occurrences, due
+
+    def _calculate_next_due(
+        self,
+        from_date: datetime,
+        interval: RecurrenceInterval,
+        anchor_day: Optional[int] = None
+    ) -> datetime:
+        """Calculate the next due date based on the interval.
 
-    def _calculate_next_due(self, from_date: datetime, interval: RecurrenceInterval) -> datetime:
-        """Calculate the next due date based on the interval."""
+        Monthly and quarterly schedules land on ``anchor_day`` (clamped to the
+        month's length) so a schedule starting on the 31st does not drift to
+        the 28th after February.
+        """
+        day = anchor_day or from_date.day
         if interval == RecurrenceInterval.DAILY:
             return from_date + timedelta(days=1)
         elif interval == RecurrenceInterval.WEEKLY:
@@ -136,13 +266,13 @@ class RecurringTransactionService:
         elif interval == RecurrenceInterval.MONTHLY:
             # Add one month, handling edge cases
             next_month = from_date.replace(day=1) + timedelta(days=32)
-            return next_month.replace(day=min(from_date.day, self._days_in_month(next_month)))
+            return next_month.replace(day=min(day, self._days_in_month(next_month)))
         elif interval == RecurrenceInterval.QUARTERLY:
             # Add three months
             next_quarter = from_date
             for _ in range(3):
                 next_month = next_quarter.replace(day=1) + timedelta(days=32)
-                next_quarter = next_month.replace(day=min(from_date.day, self._days_in_month(next_month)))
+                next_quarter = next_month.replace(day=min(day, self._days_in_month(next_month)))
             return next_quarter
         elif interval == RecurrenceInterval.YEARLY:
             # Add one year, handling leap years
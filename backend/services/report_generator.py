@@ -4,13 +4,17 @@ import plotly.express as px
 from io import BytesIO
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
 from typing import List, Dict, Any, Optional
-from ..models.finance import Transaction, Budget, SavingsGoal, FinancialSnapshot
+from ..models.finance import Transaction, SavingsGoal, FinancialSnapshot, TransactionType
 from ..schemas.finance import TransactionCategory
+from .budget_progress import BudgetProgressService
+from .transaction_rollup import TransactionRollupService
 import jinja2
 import pdfkit
 import json
+import tempfile
+import shutil
+import os
 
 class ReportGenerator:
     def __init__(self, db: Session, user_id: int):
@@ -20,69 +24,19 @@ class ReportGenerator:
             loader=jinja2.FileSystemLoader('templates/reports')
         )
 
-    def generate_transaction_excel(
-        self,
-        start_date: datetime,
-        end_date: datetime
-    ) -> BytesIO:
-        """Generate an Excel report of transactions."""
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == self.user_id,
-            Transaction.date.between(start_date, end_date)
-        ).all()
-
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'Date': t.date,
-            'Type': t.type,
-            'Category': t.category,
-            'Amount': t.amount,
-            'Description': t.description
-        } for t in transactions])
-
-        # Add summary statistics
-        summary = pd.DataFrame([{
-            'Total Income': df[df['Type'] == 'income']['Amount'].sum(),
-            'Total Expenses': df[df['Type'] == 'expense']['Amount'].sum(),
-            'Net': df[df['Type'] == 'income']['Amount'].sum() - df[df['Type'] == 'expense']['Amount'].sum()
-        }])
-
-        # Create Excel writer
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Transactions', index=False)
-            summary.to_excel(writer, sheet_name='Summary', index=False)
-
-        output.seek(0)
-        return output
-
     def generate_budget_report(self) -> dict:
         """Generate a budget analysis report."""
         current_month = datetime.now().replace(day=1)
-        next_month = (current_month + timedelta(days=32)).replace(day=1)
-
-        budgets = self.db.query(Budget).filter(
-            Budget.user_id == self.user_id,
-            Budget.start_date <= current_month,
-            Budget.end_date >= next_month
-        ).all()
-
-        report_data = []
-        for budget in budgets:
-            spent = self.db.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == self.user_id,
-                Transaction.category == budget.category,
-                Transaction.type == 'expense',
-                Transaction.date.between(current_month, next_month)
-            ).scalar() or 0
-
-            report_data.append({
-                'category': budget.category,
-                'budget_amount': budget.amount,
-                'spent_amount': spent,
-                'remaining': budget.amount - spent,
-                'percentage_used': (spent / budget.amount * 100) if budget.amount > 0 else 0
-            })
+        report_data = [
+            {
+                'category': item['category'],
+                'budget_amount': item['budget_amount'],
+                'spent_amount': item['spent_amount'],
+                'remaining': item['remaining_amount'],
+                'percentage_used': item['percentage_used']
+            }
+            for item in BudgetProgressService(self.db).get_progress(self.user_id, current_month)
+        ]
 
         return {
             'month': current_month.strftime('%B %Y'),
@@ -127,17 +81,9 @@ class ReportGenerator:
 
         # Calculate monthly averages
         last_6_months = datetime.now() - timedelta(days=180)
-        monthly_income = self.db.query(func.avg(Transaction.amount)).filter(
-            Transaction.user_id == self.user_id,
-            Transaction.type == 'income',
-            Transaction.date >= last_6_months
-        ).scalar() or 0
-
-        monthly_expenses = self.db.query(func.avg(Transaction.amount)).filter(
-            Transaction.user_id == self.user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= last_6_months
-        ).scalar() or 0
+        averages = TransactionRollupService(self.db).get_average_amounts(self.user_id, last_6_months)
+        monthly_income = averages.get(TransactionType.INCOME, 0)
+        monthly_expenses = averages.get(TransactionType.EXPENSE, 0)
 
         return {
             'net_worth': snapshot.net_worth if snapshot else 0,
@@ -182,30 +128,39 @@ class ReportGenerator:
         if 'health' in include_sections:
             data['health_report'] = self.generate_financial_health_report()
 
-        # Generate charts
-        if 'transactions' in include_sections:
-            self._generate_transaction_charts(data['transactions'])
-
-        # Render template
-        template = self.env.get_template('financial_report.html')
-        html = template.render(data=data)
-
-        # Convert to PDF
-        pdf_options = {
-            'page-size': 'A4',
-            'margin-top': '0.75in',
-            'margin-right': '0.75in',
-            'margin-bottom': '0.75in',
-            'margin-left': '0.75in',
-        }
-        pdf = pdfkit.from_string(html, False, options=pdf_options)
+        # Charts go to a per-report directory so concurrent renders don't collide
+        chart_dir = tempfile.mkdtemp(prefix='report_')
+        try:
+            if data.get('transactions'):
+                data['charts'] = self._generate_transaction_charts(data['transactions'], chart_dir)
+
+            # Render template
+            template = self.env.get_template('financial_report.html')
+            html = template.render(data=data)
+
+            # Convert to PDF
+            pdf_options = {
+                'page-size': 'A4',
+                'margin-top': '0.75in',
+                'margin-right': '0.75in',
+                'margin-bottom': '0.75in',
+                'margin-left': '0.75in',
+                'enable-local-file-access': None,
+            }
+            pdf = pdfkit.from_string(html, False, options=pdf_options)
+        finally:
+            shutil.rmtree(chart_dir, ignore_errors=True)
         
         output = BytesIO(pdf)
         output.seek(0)
         return output
 
-    def _generate_transaction_charts(self, transactions: List[Dict[str, Any]]) -> None:
-        """Generate charts for transaction analysis."""
+    def _generate_transaction_charts(self, transactions: List[Dict[str, Any]], chart_dir: str) -> Dict[str, str]:
+        """Generate charts for transaction analysis and return their file paths."""
+        charts = {
+            'monthly_comparison': os.path.join(chart_dir, 'monthly_comparison.png'),
+            'expense_distribution': os.path.join(chart_dir, 'expense_distribution.png')
+        }
         df = pd.DataFrame(transactions)
         
         # Income vs Expenses by Month
@@ -215,9 +170,11 @@ class ReportGenerator:
             go.Bar(name='Expenses', x=monthly.index.astype(str), y=monthly['expense'])
         ])
         fig.update_layout(title='Monthly Income vs Expenses')
-        fig.write_image('temp/monthly_comparison.png')
+        fig.write_image(charts['monthly_comparison'])
 
         # Expense Categories Pie Chart
         expenses = df[df['type'] == 'expense']
         fig = px.pie(expenses, values='amount', names='category', title='Expense Distribution')
-        fig.write_image('temp/expense_distribution.png')
+        fig.write_image(charts['expense_distribution'])
+
+        return charts
@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta, time
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import threading
+import logging
+import uuid
+import os
+from ..database import SessionLocal
+from ..models.finance import Transaction, Budget, SavingsGoal, FinancialSnapshot, ReportJob
+from .report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+class ReportJobQueue:
+    """Renders PDF reports on a worker pool and keeps the results for reuse.
+
+    Rendering (Jinja, Plotly/Kaleido and wkhtmltopdf) is blocking, so it runs on
+    worker threads with their own database sessions. Jobs are rows in
+    ``report_jobs`` and finished PDFs are files named by job id under
+    ``storage_dir``, so any API worker can report on or serve a job another
+    worker rendered, and jobs survive restarts. A completed job with the same
+    user, sections, date range and data version is reused, so repeated
+    downloads of an unchanged report are served without rendering again.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = int(os.getenv("REPORT_WORKERS", os.getenv("MAX_WORKERS", 4))),
+        storage_dir: str = os.getenv("REPORT_STORAGE_DIR", "./reports"),
+        job_ttl: timedelta = timedelta(hours=1),
+        poll_interval: float = 0.5
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self.storage_dir = storage_dir
+        self.job_ttl = job_ttl
+        self.poll_interval = poll_interval
+        # Futures of jobs rendering in this process, so local callers need not poll
+        self.futures: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+
+    def submit(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        sections: List[str]
+    ) -> Dict[str, Any]:
+        """Queue a report, reusing a finished or in-flight job for the same inputs."""
+        start_date = datetime.combine(start_date.date(), time.min)
+        end_date = datetime.combine(end_date.date(), time.max)
+        sections = sorted(set(sections))
+
+        db = SessionLocal()
+        try:
+            self._prune_jobs(db)
+            version = self.data_version(db, user_id)
+            cache_key = hashlib.sha256(
+                repr((sections, start_date, end_date, version)).encode()
+            ).hexdigest()
+
+            existing = db.query(ReportJob).filter(
+                ReportJob.user_id == user_id,
+                ReportJob.cache_key == cache_key,
+                ReportJob.status.in_(('pending', 'running', 'completed'))
+            ).order_by(ReportJob.created_at.desc()).first()
+            if existing and (existing.status != 'completed' or os.path.exists(self._path(existing.id))):
+                return self._snapshot(existing)
+
+            job = ReportJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                cache_key=cache_key,
+                sections=sections,
+                start_date=start_date,
+                end_date=end_date,
+                status='pending',
+                created_at=datetime.utcnow()
+            )
+            db.add(job)
+            db.commit()
+            snapshot = self._snapshot(job)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self.lock:
+            self.futures[snapshot['id']] = self.executor.submit(self._run, snapshot)
+        return snapshot
+
+    def get(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job owned by the given user."""
+        db = SessionLocal()
+        try:
+            self._prune_jobs(db)
+            job = db.query(ReportJob).filter(
+                ReportJob.id == job_id,
+                ReportJob.user_id == user_id
+            ).first()
+            return self._snapshot(job) if job else None
+        finally:
+            db.close()
+
+    def result(self, job: Dict[str, Any]) -> bytes:
+        """Get the rendered PDF of a completed job."""
+        with open(self._path(job['id']), 'rb') as f:
+            return f.read()
+
+    async def render(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        sections: List[str]
+    ) -> bytes:
+        """Submit a report and wait for it without blocking the event loop."""
+        job = await run_in_threadpool(self.submit, user_id, start_date, end_date, sections)
+        future = self.futures.get(job['id'])
+        if future is not None:
+            return await asyncio.wrap_future(future)
+
+        # Rendering, or already rendered, by another worker
+        while job['status'] in ('pending', 'running'):
+            await asyncio.sleep(self.poll_interval)
+            job = await run_in_threadpool(self.get, job['id'], user_id)
+            if job is None:
+                raise RuntimeError("Report job expired before it finished")
+        if job['status'] == 'failed':
+            raise RuntimeError(job['error'])
+        return await run_in_threadpool(self.result, job)
+
+    def data_version(self, db: Session, user_id: int) -> Tuple[Any, ...]:
+        """Fingerprint the user's report inputs so reused reports expire on change."""
+        def scalar(column, user_column):
+            return select(column).where(user_column == user_id).scalar_subquery()
+
+        return tuple(db.query(
+            scalar(func.count(Transaction.id), Transaction.user_id),
+            scalar(func.max(Transaction.updated_at), Transaction.user_id),
+            scalar(func.count(Budget.id), Budget.user_id),
+            scalar(func.max(Budget.updated_at), Budget.user_id),
+            scalar(func.count(SavingsGoal.id), SavingsGoal.user_id),
+            scalar(func.max(SavingsGoal.updated_at), SavingsGoal.user_id),
+            scalar(func.max(FinancialSnapshot.created_at), FinancialSnapshot.user_id)
+        ).one())
+
+    def _run(self, job: Dict[str, Any]) -> bytes:
+        """Render a report on a worker thread and store it for every worker."""
+        try:
+            self._update(job['id'], status='running')
+            db = SessionLocal()
+            try:
+                pdf = ReportGenerator(db, job['user_id']).generate_pdf_report(
+                    job['start_date'],
+                    job['end_date'],
+                    include_sections=job['sections']
+                ).getvalue()
+            finally:
+                db.close()
+
+            # Write then rename, so readers never see a partial file
+            os.makedirs(self.storage_dir, exist_ok=True)
+            partial = self._path(job['id']) + '.part'
+            with open(partial, 'wb') as f:
+                f.write(pdf)
+            os.replace(partial, self._path(job['id']))
+            self._update(job['id'], status='completed', completed_at=datetime.utcnow())
+            return pdf
+        except Exception as e:
+            logger.error(f"Error generating report {job['id']}: {str(e)}")
+            self._update(job['id'], status='failed', error=str(e), completed_at=datetime.utcnow())
+            raise
+        finally:
+            with self.lock:
+                self.futures.pop(job['id'], None)
+
+    def _update(self, job_id: str, **values: Any) -> None:
+        db = SessionLocal()
+        try:
+            db.query(ReportJob).filter(ReportJob.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating report job {job_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{job_id}.pdf")
+
+    def _snapshot(self, job: ReportJob) -> Dict[str, Any]:
+        return {
+            'id': job.id,
+            'user_id': job.user_id,
+            'sections': list(job.sections or []),
+            'start_date': job.start_date,
+            'end_date': job.end_date,
+            'status': job.status,
+            'error': job.error,
+            'created_at': job.created_at,
+            'completed_at': job.completed_at
+        }
+
+    def _prune_jobs(self, db: Session) -> None:
+        """Delete finished jobs older than the job TTL, and fail jobs a dead worker left unfinished."""
+        now = datetime.utcnow()
+        cutoff = now - self.job_ttl
+        try:
+            db.query(ReportJob).filter(
+                ReportJob.status.in_(('pending', 'running')),
+                ReportJob.created_at < cutoff
+            ).update(
+                {'status': 'failed', 'error': 'Report job was interrupted', 'completed_at': now},
+                synchronize_session=False
+            )
+            expired = [
+                job_id for job_id, in db.query(ReportJob.id).filter(ReportJob.completed_at < cutoff)
+            ]
+            if expired:
+                db.query(ReportJob).filter(ReportJob.id.in_(expired)).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error pruning report jobs: {str(e)}")
+            return
+
+        for job_id in expired:
+            try:
+                os.remove(self._path(job_id))
+            except FileNotFoundError:
+                pass
+
+report_jobs = ReportJobQueue()
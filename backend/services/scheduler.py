@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.orm import Session
@@ -6,9 +7,8 @@ from datetime import datetime
 import logging
 from ..database import SessionLocal
 from .recurring_transactions import RecurringTransactionService
-from .email_service import EmailService
-from ..models.notification import NotificationPreference, NotificationType
-from ..websocket_manager import manager
+from .email_fanout import get_email_fanout
+from ..models.notification import NotificationType
 
 logger = logging.getLogger(__name__)
 
@@ -54,14 +54,12 @@ class SchedulerService:
             db = SessionLocal()
             try:
                 recurring_service = RecurringTransactionService(db)
-                recurring_service.process_due_transactions()
+                generated = await run_in_threadpool(recurring_service.process_due_transactions)
                 
-                # Notify connected clients about the update
-                await manager.broadcast_to_authenticated(
-                    {"type": "RECURRING_TRANSACTIONS_PROCESSED"}
-                )
+                # Notify only the users whose transactions were generated
+                await recurring_service.notify_generated(generated)
                 
-                logger.info("Successfully processed recurring transactions")
+                logger.info(f"Successfully processed recurring transactions for {len(generated)} users")
             finally:
                 db.close()
         except Exception as e:
@@ -72,26 +70,8 @@ class SchedulerService:
         """Send weekly summary emails to subscribed users."""
         try:
             logger.info(f"Starting weekly summary email distribution at {datetime.utcnow()}")
-            db = SessionLocal()
-            try:
-                # Get users with email notifications enabled for weekly summaries
-                preferences = db.query(NotificationPreference).filter(
-                    NotificationPreference.notification_type == NotificationType.WEEKLY_SUMMARY,
-                    NotificationPreference.email_enabled == True
-                ).all()
-
-                email_service = EmailService()
-                for pref in preferences:
-                    try:
-                        user = db.query(User).filter(User.id == pref.user_id).first()
-                        if user and user.email:
-                            await email_service.send_weekly_summary(user.email, user.id, db)
-                    except Exception as e:
-                        logger.error(f"Error sending weekly summary to user {pref.user_id}: {str(e)}")
-
-                logger.info("Successfully sent weekly summaries")
-            finally:
-                db.close()
+            await get_email_fanout().run(NotificationType.WEEKLY_SUMMARY)
+            logger.info("Successfully sent weekly summaries")
         except Exception as e:
             logger.error(f"Error processing weekly summaries: {str(e)}")
 
@@ -99,26 +79,8 @@ class SchedulerService:
         """Send monthly report emails to subscribed users."""
         try:
             logger.info(f"Starting monthly report email distribution at {datetime.utcnow()}")
-            db = SessionLocal()
-            try:
-                # Get users with email notifications enabled for monthly reports
-                preferences = db.query(NotificationPreference).filter(
-                    NotificationPreference.notification_type == NotificationType.MONTHLY_REPORT,
-                    NotificationPreference.email_enabled == True
-                ).all()
-
-                email_service = EmailService()
-                for pref in preferences:
-                    try:
-                        user = db.query(User).filter(User.id == pref.user_id).first()
-                        if user and user.email:
-                            await email_service.send_monthly_report(user.email, user.id, db)
-                    except Exception as e:
-                        logger.error(f"Error sending monthly report to user {pref.user_id}: {str(e)}")
-
-                logger.info("Successfully sent monthly reports")
-            finally:
-                db.close()
+            await get_email_fanout().run(NotificationType.MONTHLY_REPORT)
+            logger.info("Successfully sent monthly reports")
         except Exception as e:
             logger.error(f"Error processing monthly reports: {str(e)}")
 
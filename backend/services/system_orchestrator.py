@@ -77,7 +77,9 @@ class SystemOrchestrator:
         """Initialize all AI subsystems."""
         try:
             # Initialize AI service manager
-            self.ai_manager = AIServiceManager()
+            self.ai_manager = AIServiceManager(
+                timeout=self.config['processing']['timeout']
+            )
             
             # Setup system connections
             self._setup_system_connections()
@@ -206,17 +208,13 @@ class SystemOrchestrator:
             # Log request
             self.logger.info(f"Processing request: {request_type}")
             
-            # Select appropriate systems
-            systems = self._select_systems(request_type, context)
-            
-            # Process with selected systems
-            results = await asyncio.gather(*[
-                system.process_request(context, preferences)
-                for system in systems
-            ])
-            
-            # Integrate results
-            integrated_result = self._integrate_results(results)
+            # Fan out to the relevant services concurrently, each bounded by
+            # the processing timeout
+            integrated_result = await self.ai_manager.process_request(
+                request_type,
+                context,
+                preferences
+            )
             
             # Log completion
             self.logger.info(f"Request processed successfully: {request_type}")
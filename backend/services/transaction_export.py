@@ -0,0 +1,157 @@
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Tuple
+from openpyxl import Workbook
+import pyarrow as pa
+import pyarrow.parquet as pq
+import tempfile
+import csv
+import io
+import os
+from ..models.finance import Transaction, TransactionType
+
+EXPORT_COLUMNS = ['Date', 'Type', 'Category', 'Amount', 'Description']
+
+PARQUET_SCHEMA = pa.schema([
+    ('date', pa.timestamp('us')),
+    ('type', pa.string()),
+    ('category', pa.string()),
+    ('amount', pa.float64()),
+    ('description', pa.string())
+])
+
+class TransactionExporter:
+    """Streams a user's transactions into CSV, XLSX or Parquet in bounded memory.
+
+    Rows are read from a server-side cursor in chunks and written out as they
+    arrive; summary totals are accumulated along the way rather than computed
+    from a materialized result set.
+    """
+
+    def __init__(self, db: Session, user_id: int, chunk_size: int = 1000):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.totals = {TransactionType.INCOME: 0.0, TransactionType.EXPENSE: 0.0}
+
+    def summary(self) -> Dict[str, float]:
+        """Get the totals accumulated by the last export."""
+        income = self.totals[TransactionType.INCOME]
+        expenses = self.totals[TransactionType.EXPENSE]
+        return {
+            'Total Income': income,
+            'Total Expenses': expenses,
+            'Net': income - expenses
+        }
+
+    def stream_csv(self, start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+        """Yield the export as CSV, one encoded chunk per batch of rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+        for batch in self._iter_batches(start_date, end_date):
+            writer.writerows(
+                (date.isoformat() if date else '', type, category, amount, description)
+                for date, type, category, amount, description in batch
+            )
+            yield self._drain(buffer)
+
+        writer.writerow([])
+        for label, value in self.summary().items():
+            writer.writerow([label, value])
+        yield self._drain(buffer)
+
+    def stream_xlsx(self, start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+        """Yield the export as an XLSX workbook written with openpyxl's write-only mode."""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Transactions')
+        sheet.append(EXPORT_COLUMNS)
+
+        for batch in self._iter_batches(start_date, end_date):
+            for row in batch:
+                sheet.append(row)
+
+        summary_sheet = workbook.create_sheet('Summary')
+        summary = self.summary()
+        summary_sheet.append(list(summary.keys()))
+        summary_sheet.append(list(summary.values()))
+
+        # The zip container can only be finalized once all rows are written,
+        # so spool it to disk and stream the file back
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as handle:
+            path = handle.name
+        try:
+            workbook.save(path)
+            yield from self._stream_file(path)
+        finally:
+            os.remove(path)
+
+    def stream_parquet(self, start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+        """Yield the export as Parquet, writing one row group per batch."""
+        with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as handle:
+            path = handle.name
+        try:
+            with pq.ParquetWriter(path, PARQUET_SCHEMA) as writer:
+                for batch in self._iter_batches(start_date, end_date):
+                    columns = list(zip(*batch))
+                    writer.write_table(pa.Table.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(columns, PARQUET_SCHEMA)],
+                        schema=PARQUET_SCHEMA
+                    ))
+                writer.add_key_value_metadata({
+                    label: str(value) for label, value in self.summary().items()
+                })
+            yield from self._stream_file(path)
+        finally:
+            os.remove(path)
+
+    def _iter_batches(self, start_date: datetime, end_date: datetime) -> Iterator[List[Tuple[Any, ...]]]:
+        """Read matching transactions from a server-side cursor in chunks."""
+        self.totals = {TransactionType.INCOME: 0.0, TransactionType.EXPENSE: 0.0}
+        query = self.db.query(
+            Transaction.date,
+            Transaction.type,
+            Transaction.category,
+            Transaction.amount,
+            Transaction.description
+        ).filter(
+            Transaction.user_id == self.user_id,
+            Transaction.date.between(start_date, end_date)
+        ).order_by(Transaction.date, Transaction.id).yield_per(self.chunk_size)
+
+        batch = []
+        for row in query:
+            type = TransactionType(row.type) if row.type else None
+            if type in self.totals:
+                self.totals[type] += row.amount or 0
+
+            batch.append((
+                row.date,
+                getattr(row.type, 'value', row.type),
+                getattr(row.category, 'value', row.category),
+                row.amount,
+                row.description
+            ))
+            if len(batch) >= self.chunk_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _drain(self, buffer: io.StringIO) -> bytes:
+        """Take everything written to the buffer so far and reset it."""
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    def _stream_file(self, path: str, block_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield a file's contents in fixed-size blocks."""
+        with open(path, 'rb') as handle:
+            while True:
+                block = handle.read(block_size)
+                if not block:
+                    return
+                yield block
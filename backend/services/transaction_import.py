@@ -0,0 +1,142 @@
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+import pandas as pd
+import io
+from ..models.finance import Transaction, TransactionType, TransactionCategory, RecurrenceType
+from .transaction_rollup import TransactionRollupService
+from .user_context import user_context_cache
+
+REQUIRED_COLUMNS = ['type', 'category', 'amount', 'description', 'date']
+
+class TransactionImporter:
+    """Validates and inserts many transactions for one user in a single database transaction.
+
+    Rows are checked column-wise with pandas, so validation cost does not grow
+    with per-row Python work, and valid rows are written with
+    ``bulk_insert_mappings`` in chunks. Invalid rows are reported by their
+    position in the input rather than failing the whole import.
+    """
+
+    def __init__(self, db: Session, user_id: int, chunk_size: int = 1000):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+
+    def parse_records(self, records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Load rows from a decoded JSON array."""
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ValueError("Expected a JSON array of transaction objects")
+        return pd.DataFrame.from_records(records)
+
+    def parse_csv(self, content: bytes) -> pd.DataFrame:
+        """Load rows from CSV with a header row."""
+        return pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False)
+
+    def parse_ndjson(self, content: bytes) -> pd.DataFrame:
+        """Load rows from newline-delimited JSON."""
+        return pd.read_json(io.BytesIO(content), lines=True, dtype=False)
+
+    def import_frame(self, frame: pd.DataFrame, strict: bool = False) -> Dict[str, Any]:
+        """Validate and insert rows, returning counts and per-row errors.
+
+        With ``strict`` nothing is inserted if any row is invalid.
+        """
+        valid, errors = self.validate(frame)
+        inserted = 0
+        if not valid.empty and not (strict and errors):
+            inserted = self.insert(valid)
+
+        return {
+            'total': len(frame),
+            'inserted': inserted,
+            'failed': len(errors),
+            'errors': errors
+        }
+
+    def validate(self, frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+        """Normalize the columns and split the frame into valid rows and row errors."""
+        frame = frame.reset_index(drop=True)
+        for column in REQUIRED_COLUMNS:
+            if column not in frame.columns:
+                frame[column] = None
+
+        data = pd.DataFrame(index=frame.index)
+        failures: Dict[str, pd.Series] = {}
+
+        for column, enum in (('type', TransactionType), ('category', TransactionCategory)):
+            data[column] = frame[column].astype(str).str.strip().str.lower()
+            failures[column] = ~data[column].isin([member.value for member in enum])
+
+        data['amount'] = pd.to_numeric(frame['amount'], errors='coerce')
+        failures['amount'] = ~(data['amount'] > 0)
+
+        dates = pd.to_datetime(frame['date'], errors='coerce', utc=True, format='mixed')
+        data['date'] = dates.dt.tz_convert(None)
+        failures['date'] = dates.isna()
+
+        data['description'] = frame['description'].fillna('').astype(str)
+        # CSV keeps empty cells as '' rather than NaN, so blank counts as missing
+        failures['description'] = data['description'].str.strip() == ''
+
+        if 'recurrence' in frame.columns:
+            recurrence = frame['recurrence'].fillna('').astype(str).str.strip().str.lower()
+            data['recurrence'] = recurrence.mask(recurrence == '', RecurrenceType.NONE.value)
+            failures['recurrence'] = ~data['recurrence'].isin([member.value for member in RecurrenceType])
+        else:
+            data['recurrence'] = RecurrenceType.NONE.value
+
+        if 'metadata' in frame.columns:
+            data['metadata'] = frame['metadata']
+
+        messages = {
+            'type': f"must be one of {', '.join(member.value for member in TransactionType)}",
+            'category': f"must be one of {', '.join(member.value for member in TransactionCategory)}",
+            'amount': "must be a number greater than 0",
+            'date': "must be a valid date",
+            'description': "is required",
+            'recurrence': f"must be one of {', '.join(member.value for member in RecurrenceType)}"
+        }
+        failed = pd.DataFrame(failures)
+        invalid = failed.any(axis=1)
+
+        errors = [
+            {
+                'row': int(index),
+                'errors': {column: messages[column] for column in failed.columns if row[column]}
+            }
+            for index, row in failed[invalid].iterrows()
+        ]
+        return data[~invalid], errors
+
+    def insert(self, data: pd.DataFrame) -> int:
+        """Insert validated rows in chunks and update the rollup, committing once."""
+        now = datetime.utcnow()
+        mappings = [
+            {
+                'user_id': self.user_id,
+                'type': TransactionType(row['type']),
+                'category': TransactionCategory(row['category']),
+                'amount': float(row['amount']),
+                'description': row['description'],
+                'date': row['date'].to_pydatetime(),
+                'recurrence': RecurrenceType(row['recurrence']),
+                'metadata': row['metadata'] if isinstance(row.get('metadata'), dict) else None,
+                'created_at': now,
+                'updated_at': now
+            }
+            for row in data.to_dict('records')
+        ]
+
+        try:
+            for offset in range(0, len(mappings), self.chunk_size):
+                self.db.bulk_insert_mappings(Transaction, mappings[offset:offset + self.chunk_size])
+            TransactionRollupService(self.db).record_snapshots(mappings)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Bulk inserts skip the ORM events that keep the AI context fresh
+        user_context_cache.invalidate(self.user_id, ('financial_context',))
+        return len(mappings)
@@ -0,0 +1,355 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, extract, and_, update, select, union, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+import argparse
+import logging
+import threading
+from ..database import SessionLocal
+from ..models.finance import (
+    Transaction, TransactionMonthlyRollup, TransactionRollupState, TransactionType, TransactionCategory
+)
+
+logger = logging.getLogger(__name__)
+
+RollupKey = Tuple[int, int, int, TransactionType, TransactionCategory]
+
+ROLLUP_KEY_COLUMNS = ['user_id', 'year', 'month', 'type', 'category']
+
+# First key of the PostgreSQL advisory locks that serialize a user's rebuild
+# against writes to that user's rollup
+ROLLUP_LOCK_NAMESPACE = 7301
+
+# Users known to have a built rollup, so reads skip the state lookup
+_built_users = set()
+_built_users_lock = threading.Lock()
+
+class TransactionRollupService:
+    """Maintains the per-user monthly rollup of transaction totals.
+
+    Write paths call the ``record_*`` methods before committing so the rollup
+    changes in the same database transaction as the rows it summarizes. A
+    user's rollup is rebuilt from raw transactions the first time it is read
+    (tracked in ``transaction_rollup_states``), so deployments that predate
+    the rollup show full history without a manual backfill.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def snapshot(self, transaction: Transaction) -> Dict[str, Any]:
+        """Capture the fields that determine a transaction's rollup contribution."""
+        return {
+            'user_id': transaction.user_id,
+            'date': transaction.date,
+            'type': transaction.type,
+            'category': transaction.category,
+            'amount': transaction.amount
+        }
+
+    def record_transaction(self, transaction: Transaction, sign: int = 1) -> None:
+        """Add a transaction to the rollup, or remove it with ``sign=-1``."""
+        self.record_snapshots([self.snapshot(transaction)], sign)
+
+    def record_update(self, previous: Dict[str, Any], transaction: Transaction) -> None:
+        """Move a transaction's contribution from its previous values to its current ones."""
+        deltas: Dict[RollupKey, List[float]] = {}
+        self._accumulate(deltas, previous, -1)
+        self._accumulate(deltas, self.snapshot(transaction), 1)
+        self._apply(deltas)
+
+    def record_snapshots(self, snapshots: List[Dict[str, Any]], sign: int = 1) -> None:
+        """Apply many transaction snapshots with one upsert of the affected rollup rows."""
+        deltas: Dict[RollupKey, List[float]] = {}
+        for snapshot in snapshots:
+            self._accumulate(deltas, snapshot, sign)
+        self._apply(deltas)
+
+    def get_rollups(
+        self,
+        user_id: int,
+        start_month: datetime,
+        end_month: datetime,
+        type: Optional[TransactionType] = None,
+        categories: Optional[List[TransactionCategory]] = None
+    ) -> List[TransactionMonthlyRollup]:
+        """Get rollup rows for the months from ``start_month`` to ``end_month`` inclusive."""
+        self.ensure_built(user_id)
+        month_index = TransactionMonthlyRollup.year * 12 + TransactionMonthlyRollup.month
+        query = self.db.query(TransactionMonthlyRollup).filter(
+            TransactionMonthlyRollup.user_id == user_id,
+            month_index.between(
+                start_month.year * 12 + start_month.month,
+                end_month.year * 12 + end_month.month
+            )
+        )
+
+        if type:
+            query = query.filter(TransactionMonthlyRollup.type == type)
+        if categories is not None:
+            query = query.filter(TransactionMonthlyRollup.category.in_(categories))
+
+        return query.all()
+
+    def get_average_amounts(self, user_id: int, since: datetime) -> Dict[TransactionType, float]:
+        """Get the average transaction amount per type for transactions since a date.
+
+        Whole months come from the rollup; the partial month containing
+        ``since`` is read from raw transactions so nothing before ``since``
+        is counted.
+        """
+        first_full_month = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if first_full_month < since:
+            first_full_month = (
+                first_full_month.replace(year=first_full_month.year + 1, month=1)
+                if first_full_month.month == 12
+                else first_full_month.replace(month=first_full_month.month + 1)
+            )
+
+        sums: Dict[TransactionType, List[float]] = {}
+        if first_full_month > since:
+            partial = self.db.query(
+                Transaction.type,
+                func.sum(Transaction.amount),
+                func.count(Transaction.id)
+            ).filter(
+                Transaction.user_id == user_id,
+                Transaction.date >= since,
+                Transaction.date < first_full_month
+            ).group_by(Transaction.type)
+            for type, total, count in partial:
+                type_sums = sums.setdefault(TransactionType(type), [0.0, 0])
+                type_sums[0] += total or 0
+                type_sums[1] += count or 0
+
+        if first_full_month <= datetime.utcnow():
+            for row in self.get_rollups(user_id, first_full_month, datetime.utcnow()):
+                type_sums = sums.setdefault(TransactionType(row.type), [0.0, 0])
+                type_sums[0] += row.total or 0
+                type_sums[1] += row.count or 0
+
+        return {
+            type: total / count
+            for type, (total, count) in sums.items()
+            if count > 0
+        }
+
+    def ensure_built(self, user_id: int) -> None:
+        """Rebuild a user's rollup from raw transactions unless that has been done before."""
+        if user_id in _built_users:
+            return
+        if self.db.get(TransactionRollupState, user_id) is None:
+            # Own session, so the caller's transaction is left untouched
+            db = SessionLocal()
+            try:
+                TransactionRollupService(db).rebuild_user(user_id, if_missing=True)
+            finally:
+                db.close()
+        with _built_users_lock:
+            _built_users.add(user_id)
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recompute the rollup from raw transactions for one user or for everyone, one user at a time."""
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = [
+                row[0] for row in self.db.execute(union(
+                    select(Transaction.user_id),
+                    select(TransactionMonthlyRollup.user_id)
+                ))
+                if row[0] is not None
+            ]
+            self.db.rollback()
+
+        count = sum(self.rebuild_user(user_id) for user_id in sorted(user_ids))
+        logger.info(f"Rebuilt {count} transaction rollup rows for {len(user_ids)} users")
+        return count
+
+    def rebuild_user(self, user_id: int, if_missing: bool = False) -> int:
+        """Recompute one user's rollup in a single transaction under the user's rollup lock.
+
+        Concurrent writes to the user's rollup wait for the rebuild, so no
+        transaction is lost or counted twice. With ``if_missing`` nothing is
+        done if another worker built the rollup first.
+        """
+        try:
+            self._lock_user(user_id, exclusive=True)
+            if if_missing and self.db.get(TransactionRollupState, user_id) is not None:
+                self.db.rollback()
+                return 0
+
+            self.db.query(TransactionMonthlyRollup).filter(
+                TransactionMonthlyRollup.user_id == user_id
+            ).delete(synchronize_session=False)
+
+            year = extract('year', Transaction.date).label('year')
+            month = extract('month', Transaction.date).label('month')
+            rows = self.db.query(
+                year,
+                month,
+                Transaction.type,
+                Transaction.category,
+                func.sum(Transaction.amount).label('total'),
+                func.count(Transaction.id).label('count')
+            ).filter(
+                Transaction.user_id == user_id,
+                Transaction.date.isnot(None)
+            ).group_by(year, month, Transaction.type, Transaction.category).all()
+
+            now = datetime.utcnow()
+            self.db.bulk_insert_mappings(TransactionMonthlyRollup, [
+                {
+                    'user_id': user_id,
+                    'year': int(row.year),
+                    'month': int(row.month),
+                    'type': row.type,
+                    'category': row.category,
+                    'total': row.total or 0,
+                    'count': row.count,
+                    'updated_at': now
+                }
+                for row in rows
+            ])
+            self.db.merge(TransactionRollupState(user_id=user_id, rebuilt_at=now))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        with _built_users_lock:
+            _built_users.add(user_id)
+        return len(rows)
+
+    def _lock_user(self, user_id: int, exclusive: bool) -> None:
+        """Take the user's rollup lock for the current transaction.
+
+        Rebuilds take it exclusively and writers shared. On PostgreSQL this is
+        an advisory lock. On MySQL a rebuild locks the user's transaction rows
+        and the index gaps around them, which blocks writers' inserts and
+        updates. SQLite allows a single writer at a time, which already
+        serializes the two.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            function = 'pg_advisory_xact_lock' if exclusive else 'pg_advisory_xact_lock_shared'
+            self.db.execute(
+                text(f"SELECT {function}(:namespace, :user_id)"),
+                {'namespace': ROLLUP_LOCK_NAMESPACE, 'user_id': user_id}
+            )
+        elif dialect == 'mysql' and exclusive:
+            self.db.execute(
+                select(Transaction.id).where(Transaction.user_id == user_id).with_for_update()
+            ).all()
+
+    def _accumulate(
+        self,
+        deltas: Dict[RollupKey, List[float]],
+        snapshot: Dict[str, Any],
+        sign: int
+    ) -> None:
+        """Add one snapshot's amount and count to the pending deltas."""
+        if snapshot['date'] is None or snapshot['type'] is None or snapshot['category'] is None:
+            return
+
+        key = (
+            snapshot['user_id'],
+            snapshot['date'].year,
+            snapshot['date'].month,
+            TransactionType(snapshot['type']),
+            TransactionCategory(snapshot['category'])
+        )
+        delta = deltas.setdefault(key, [0.0, 0])
+        delta[0] += sign * (snapshot['amount'] or 0)
+        delta[1] += sign
+
+    def _apply(self, deltas: Dict[RollupKey, List[float]]) -> None:
+        """Add the pending deltas to the rollup table atomically, without committing.
+
+        Totals are incremented in SQL (``total = total + delta``) through an
+        insert-or-update on the rollup key, so concurrent writers neither lose
+        increments nor collide on the unique constraint.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+        if not deltas:
+            return
+
+        # Wait out any rebuild of these users; sorted so writers lock in one order
+        for user_id in sorted({key[0] for key in deltas}):
+            self._lock_user(user_id, exclusive=False)
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'year': year,
+                'month': month,
+                'type': type,
+                'category': category,
+                'total': total,
+                'count': count,
+                'updated_at': now
+            }
+            for (user_id, year, month, type, category), (total, count) in deltas.items()
+        ]
+
+        table = TransactionMonthlyRollup.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=ROLLUP_KEY_COLUMNS,
+                set_={
+                    'total': func.coalesce(table.c.total, 0) + stmt.excluded.total,
+                    'count': func.coalesce(table.c.count, 0) + stmt.excluded.count,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            )
+            self.db.execute(stmt, rows)
+        elif dialect == 'mysql':
+            stmt = mysql_insert(table)
+            stmt = stmt.on_duplicate_key_update(
+                total=func.coalesce(table.c.total, 0) + stmt.inserted.total,
+                count=func.coalesce(table.c.count, 0) + stmt.inserted.count,
+                updated_at=stmt.inserted.updated_at
+            )
+            self.db.execute(stmt, rows)
+        else:
+            for row in rows:
+                self._increment(row)
+
+    def _increment(self, row: Dict[str, Any]) -> None:
+        """Atomic update, falling back to an insert when the key does not exist yet."""
+        table = TransactionMonthlyRollup.__table__
+        key = and_(*(table.c[column] == row[column] for column in ROLLUP_KEY_COLUMNS))
+        increment = update(table).where(key).values(
+            total=func.coalesce(table.c.total, 0) + row['total'],
+            count=func.coalesce(table.c.count, 0) + row['count'],
+            updated_at=row['updated_at']
+        )
+
+        if self.db.execute(increment).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(table.insert().values(**row))
+        except IntegrityError:
+            # Another writer created the row first
+            self.db.execute(increment)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the transaction monthly rollup table.")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild rows for this user")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = TransactionRollupService(db).rebuild(args.user_id)
+        print(f"Rebuilt {count} rollup rows")
+    finally:
+        db.close()
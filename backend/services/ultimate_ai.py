@@ -2,7 +2,7 @@ from typing import Dict, List, Optional, Any
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 import asyncio
-from transformers import pipeline, AutoModel, AutoTokenizer
+from .model_registry import pipeline, model_registry
 import openai
 import numpy as np
 import json
@@ -66,7 +66,7 @@ class UltimateAI:
         """Setup general AI capabilities."""
         return {
             'reasoning': pipeline("text-generation", model="gpt-4"),
-            'learning': AutoModel.from_pretrained("learning-model"),
+            'learning': model_registry.auto_model("learning-model"),
             'adaptation': pipeline("adaptation"),
             'memory': self._setup_memory_system(),
             'planning': pipeline("planning"),
@@ -107,7 +107,7 @@ class UltimateAI:
         """Setup emotional AI capabilities."""
         return {
             'emotion_recognition': pipeline("emotion"),
-            'sentiment_analysis': pipeline("sentiment-analysis"),
+            'sentiment_analysis': pipeline("sentiment-analysis").batched(),
             'empathy_modeling': self._setup_empathy_system(),
             'personality_analysis': self._setup_personality_system(),
             'mood_tracking': self._setup_mood_tracking()
@@ -441,8 +441,13 @@ class UltimateAI:
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Analyze and categorize request."""
-        # TODO: Implement request analysis
-        pass
+        analysis = {'request_type': request_type}
+        data = context.get('data')
+        text = context.get('text') or (data.get('text') if isinstance(data, dict) else None)
+        if isinstance(text, str) and text.strip():
+            # Concurrent requests share one batched forward pass
+            analysis['sentiment'] = (await self.emotional_ai['sentiment_analysis'].run(text))[0]
+        return analysis
 
     async def _select_ai_systems(
         self,
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+import threading
+import logging
+import copy
+import time
+import os
+from ..models.user import User
+from ..models.health import HealthMetric, HealthGoal
+from ..models.finance import Transaction
+from ..models.portal import Portal
+
+logger = logging.getLogger(__name__)
+
+PENDING_INVALIDATIONS = 'user_context_invalidations'
+
+class UserContextCache:
+    """Per-user snapshot of the context used to personalize AI responses.
+
+    The snapshot is split into sections that are built independently. Writes to
+    the models a section is derived from invalidate just that section (see
+    ``SECTION_DEPENDENCIES``), so an unchanged user is served with no queries
+    and a new transaction only rebuilds the financial section. The TTL bounds
+    staleness from writes that bypass ORM events, such as bulk statements or
+    other worker processes.
+    """
+
+    def __init__(
+        self,
+        max_users: int = int(os.getenv("USER_CONTEXT_CACHE_SIZE", 1024)),
+        ttl: int = int(os.getenv("USER_CONTEXT_TTL", 300))
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.snapshots: "OrderedDict[int, Dict[str, Tuple[Any, float]]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> Dict[str, Any]:
+        """Get a user's context, rebuilding only the sections that are missing or stale."""
+        now = time.time()
+        with self.lock:
+            sections = dict(self.snapshots.get(user_id, {}))
+            if user_id in self.snapshots:
+                self.snapshots.move_to_end(user_id)
+
+        missing = [
+            name for name in SECTION_BUILDERS
+            if name not in sections or sections[name][1] <= now
+        ]
+        if missing:
+            try:
+                user = db.query(User).filter(User.id == user_id).first()
+                if not user:
+                    return {}
+                built = {
+                    name: (SECTION_BUILDERS[name](db, user), now + self.ttl)
+                    for name in missing
+                }
+            except Exception as e:
+                logger.error(f"Error gathering user context: {str(e)}")
+                return {}
+
+            sections.update(built)
+            with self.lock:
+                snapshot = self.snapshots.setdefault(user_id, {})
+                snapshot.update(built)
+                self.snapshots.move_to_end(user_id)
+                while len(self.snapshots) > self.max_users:
+                    self.snapshots.popitem(last=False)
+
+        # Callers extend the context they get back, so hand out a copy
+        return copy.deepcopy({name: value for name, (value, _) in sections.items()})
+
+    def invalidate(self, user_id: int, sections: Optional[Iterable[str]] = None) -> None:
+        """Drop some or all cached sections of a user's context."""
+        with self.lock:
+            snapshot = self.snapshots.get(user_id)
+            if snapshot is None:
+                return
+            if sections is None:
+                del self.snapshots[user_id]
+                return
+            for name in sections:
+                snapshot.pop(name, None)
+
+def _build_user_profile(db: Session, user: User) -> Dict[str, Any]:
+    goals = db.query(HealthGoal).filter(
+        HealthGoal.user_id == user.id,
+        HealthGoal.status == "in_progress"
+    ).all()
+
+    return {
+        "age": user.age,
+        "gender": user.gender,
+        "preferences": user.preferences,
+        "needs": user.specific_needs,
+        "goals": [goal.goal_type for goal in goals]
+    }
+
+def _build_health_context(db: Session, user: User) -> Dict[str, Any]:
+    health_metrics = db.query(HealthMetric).filter(
+        HealthMetric.user_id == user.id
+    ).order_by(HealthMetric.timestamp.desc()).limit(10).all()
+
+    return {
+        "metrics": [
+            {
+                "type": metric.metric_type.value,
+                "value": metric.value,
+                "unit": metric.unit
+            }
+            for metric in health_metrics
+        ],
+        "conditions": user.health_conditions
+    }
+
+def _build_financial_context(db: Session, user: User) -> Dict[str, Any]:
+    transactions = db.query(Transaction).filter(
+        Transaction.user_id == user.id
+    ).order_by(Transaction.date.desc()).limit(10).all()
+
+    return {
+        "recent_transactions": [
+            {
+                "category": tx.category,
+                "amount": tx.amount
+            }
+            for tx in transactions
+        ],
+        "financial_goals": user.financial_goals
+    }
+
+def _build_connected_services(db: Session, user: User) -> Any:
+    portals = db.query(Portal).filter(
+        Portal.user_id == user.id
+    ).all()
+
+    return [portal.portal_type.value for portal in portals]
+
+SECTION_BUILDERS: Dict[str, Callable[[Session, User], Any]] = {
+    "user_profile": _build_user_profile,
+    "health_context": _build_health_context,
+    "financial_context": _build_financial_context,
+    "connected_services": _build_connected_services
+}
+
+SECTION_DEPENDENCIES = {
+    User: ("user_profile", "health_context", "financial_context"),
+    HealthGoal: ("user_profile",),
+    HealthMetric: ("health_context",),
+    Transaction: ("financial_context",),
+    Portal: ("connected_services",)
+}
+
+user_context_cache = UserContextCache()
+
+def _on_model_change(mapper, connection, target) -> None:
+    """Invalidate the sections derived from a changed row.
+
+    Sections are dropped at flush so the writing session sees its own change,
+    and again after commit so a concurrent rebuild from pre-commit data does
+    not linger.
+    """
+    user_id = target.id if isinstance(target, User) else target.user_id
+    sections = SECTION_DEPENDENCIES[mapper.class_]
+    user_context_cache.invalidate(user_id, sections)
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(
+            (user_id, name) for name in sections
+        )
+
+def _on_commit(session: Session) -> None:
+    for user_id, name in session.info.pop(PENDING_INVALIDATIONS, ()):
+        user_context_cache.invalidate(user_id, (name,))
+
+def _on_rollback(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+for model in SECTION_DEPENDENCIES:
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, event_name, _on_model_change)
+
+event.listen(Session, "after_commit", _on_commit)
+event.listen(Session, "after_rollback", _on_rollback)
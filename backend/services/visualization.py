@@ -1,15 +1,17 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_
+from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from ..models.finance import Transaction, Budget, SavingsGoal, FinancialSnapshot
+from ..models.finance import Transaction, SavingsGoal, FinancialSnapshot, TransactionType
+from .budget_progress import BudgetProgressService
+from .transaction_rollup import TransactionRollupService
 import plotly.graph_objects as go
 import plotly.express as px
 import plotly.subplots as sp
 import pandas as pd
 import numpy as np
-from io import BytesIO
-import base64
+import json
+from .chart_renderer import chart_renderer
 
 class VisualizationService:
     def __init__(self, db: Session):
@@ -17,17 +19,21 @@ class VisualizationService:
 
     def _fig_to_base64(self, fig) -> str:
         """Convert a plotly figure to base64 string."""
-        buffer = BytesIO()
-        fig.write_image(buffer, format="png")
-        buffer.seek(0)
-        return base64.b64encode(buffer.read()).decode()
+        return chart_renderer.render_base64(fig)
+
+    def _chart_output(self, fig, image: bool) -> Dict[str, Any]:
+        """Render the figure to a PNG, or return its JSON spec for client-side rendering."""
+        if image:
+            return {"image": self._fig_to_base64(fig)}
+        return {"figure": json.loads(fig.to_json())}
 
     def spending_by_category(
         self,
         user_id: int,
         start_date: datetime,
         end_date: datetime,
-        chart_type: str = "pie"
+        chart_type: str = "pie",
+        image: bool = True
     ) -> Dict[str, Any]:
         """Generate spending by category visualization."""
         transactions = self.db.query(
@@ -66,31 +72,29 @@ class VisualizationService:
         return {
             "type": chart_type,
             "data": df.to_dict('records'),
-            "image": self._fig_to_base64(fig)
+            **self._chart_output(fig, image)
         }
 
     def income_vs_expenses(
         self,
         user_id: int,
-        months: int = 12
+        months: int = 12,
+        image: bool = True
     ) -> Dict[str, Any]:
         """Generate income vs expenses trend visualization."""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=30 * months)
 
-        transactions = self.db.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            Transaction.type,
-            func.sum(Transaction.amount).label('total')
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.date.between(start_date, end_date)
-        ).group_by(
-            'year', 'month', Transaction.type
-        ).all()
+        rollups = TransactionRollupService(self.db).get_rollups(user_id, start_date, end_date)
+        totals = {}
+        for row in rollups:
+            key = (row.year, row.month, TransactionType(row.type).value)
+            totals[key] = totals.get(key, 0) + (row.total or 0)
 
-        df = pd.DataFrame(transactions, columns=['year', 'month', 'type', 'total'])
+        df = pd.DataFrame(
+            [(year, month, type, total) for (year, month, type), total in totals.items()],
+            columns=['year', 'month', 'type', 'total']
+        )
         df['date'] = pd.to_datetime(df[['year', 'month']].assign(day=1))
 
         # Pivot the data for plotting
@@ -131,43 +135,30 @@ class VisualizationService:
         return {
             "type": "bar_line",
             "data": df_pivot.reset_index().to_dict('records'),
-            "image": self._fig_to_base64(fig)
+            **self._chart_output(fig, image)
         }
 
     def budget_progress(
         self,
         user_id: int,
-        month: Optional[datetime] = None
+        month: Optional[datetime] = None,
+        image: bool = True
     ) -> Dict[str, Any]:
         """Generate budget progress visualization."""
         if not month:
             month = datetime.utcnow().replace(day=1)
 
-        next_month = (month + timedelta(days=32)).replace(day=1)
-
         # Get budgets and actual spending
-        budgets = self.db.query(Budget).filter(
-            Budget.user_id == user_id,
-            Budget.start_date <= month,
-            Budget.end_date >= next_month
-        ).all()
-
-        data = []
-        for budget in budgets:
-            spent = self.db.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.category == budget.category,
-                Transaction.type == 'expense',
-                Transaction.date.between(month, next_month)
-            ).scalar() or 0
-
-            data.append({
-                'category': budget.category,
-                'budget': budget.amount,
-                'spent': spent,
-                'remaining': budget.amount - spent,
-                'percentage': (spent / budget.amount * 100) if budget.amount > 0 else 0
-            })
+        data = [
+            {
+                'category': item['category'],
+                'budget': item['budget_amount'],
+                'spent': item['spent_amount'],
+                'remaining': item['remaining_amount'],
+                'percentage': item['percentage_used']
+            }
+            for item in BudgetProgressService(self.db).get_progress(user_id, month)
+        ]
 
         df = pd.DataFrame(data)
 
@@ -198,12 +189,13 @@ class VisualizationService:
         return {
             "type": "stacked_bar",
             "data": df.to_dict('records'),
-            "image": self._fig_to_base64(fig)
+            **self._chart_output(fig, image)
         }
 
     def savings_goals_progress(
         self,
-        user_id: int
+        user_id: int,
+        image: bool = True
     ) -> Dict[str, Any]:
         """Generate savings goals progress visualization."""
         goals = self.db.query(SavingsGoal).filter(
@@ -260,12 +252,13 @@ class VisualizationService:
         return {
             "type": "bullet",
             "data": df.to_dict('records'),
-            "image": self._fig_to_base64(fig)
+            **self._chart_output(fig, image)
         }
 
     def financial_health_dashboard(
         self,
-        user_id: int
+        user_id: int,
+        image: bool = True
     ) -> Dict[str, Any]:
         """Generate comprehensive financial health dashboard."""
         # Get latest snapshot
@@ -275,17 +268,9 @@ class VisualizationService:
 
         # Calculate monthly averages
         last_6_months = datetime.utcnow() - timedelta(days=180)
-        monthly_income = self.db.query(func.avg(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'income',
-            Transaction.date >= last_6_months
-        ).scalar() or 0
-
-        monthly_expenses = self.db.query(func.avg(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= last_6_months
-        ).scalar() or 0
+        averages = TransactionRollupService(self.db).get_average_amounts(user_id, last_6_months)
+        monthly_income = averages.get(TransactionType.INCOME, 0)
+        monthly_expenses = averages.get(TransactionType.EXPENSE, 0)
 
         # Create subplot figure
         fig = sp.make_subplots(
@@ -382,5 +367,5 @@ class VisualizationService:
                 "debt_to_income": snapshot.debt_to_income_ratio if snapshot else 0,
                 "emergency_fund": snapshot.emergency_fund_ratio if snapshot else 0
             },
-            "image": self._fig_to_base64(fig)
+            **self._chart_output(fig, image)
         }
@@ -0,0 +1,19 @@
+from typing import Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+def encode_cursor(date: Optional[datetime], id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque URL-safe cursor; the date may be NULL."""
+    payload = json.dumps({"d": date.isoformat() if date else None, "i": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date = datetime.fromisoformat(payload["d"]) if payload["d"] is not None else None
+        return date, int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,42 +1,188 @@
-from typing import Dict, List
+from typing import Dict, Iterable, Optional, Set
 from fastapi import WebSocket
+import asyncio
+import logging
 import json
+import os
 from datetime import datetime
+from .pubsub import PubSub, create_pubsub, user_channel, BROADCAST_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Close code for clients dropped because they could not keep up
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+class Connection:
+    """One websocket with a bounded outbound queue drained by its own task."""
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.task: Optional[asyncio.Task] = None
+
+    def enqueue(self, text: str) -> bool:
+        """Queue a serialized message; returns False if the queue is full."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
 
 class ConnectionManager:
-    def __init__(self):
+    """Tracks this worker's sockets and routes messages to them through pub/sub.
+
+    Messages for a user or for everyone are published to the pub/sub backend;
+    each worker subscribes to the channels of the users connected to it and
+    delivers what it receives to its own sockets.
+    """
+
+    def __init__(
+        self,
+        pubsub: Optional[PubSub] = None,
+        max_queue: int = int(os.getenv("WS_SEND_QUEUE_SIZE", 100))
+    ):
         # Store active connections by user_id
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Dict[WebSocket, Connection]] = {}
+        self.pubsub = pubsub or create_pubsub()
+        self.max_queue = max_queue
+        self.started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+        # Background unsubscribes and closes, referenced so they are not garbage-collected mid-run
+        self._tasks: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket, user_id: str):
+        """Accept an authenticated websocket and start its sender task."""
+        await self._ensure_started()
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        user_id = str(user_id)
+        connection = Connection(websocket, user_id, self.max_queue)
+        connection.task = asyncio.create_task(self._drain(connection))
+        first = user_id not in self.active_connections
+        self.active_connections.setdefault(user_id, {})[websocket] = connection
+        if first:
+            await self.pubsub.subscribe(user_channel(user_id))
 
     def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+        """Forget a websocket and stop its sender task."""
+        user_id = str(user_id)
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            return
+        connection = connections.pop(websocket, None)
+        if not connections:
+            del self.active_connections[user_id]
+            self._spawn(self._unsubscribe_if_idle(user_id))
+        if connection and connection.task and connection.task is not asyncio.current_task():
+            connection.task.cancel()
 
     async def send_personal_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            message["timestamp"] = datetime.utcnow().isoformat()
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    # Handle disconnected clients
-                    await self.disconnect(connection, user_id)
+        """Publish a message for every connection of one user, on any worker."""
+        await self._ensure_started()
+        await self.pubsub.publish(user_channel(user_id), self._serialize(message))
+
+    async def send_to(self, websocket: WebSocket, user_id: str, message: dict):
+        """Queue a message for a single connection."""
+        connection = self.active_connections.get(str(user_id), {}).get(websocket)
+        if connection:
+            self._fan_out(self._serialize(message), [connection])
 
     async def broadcast(self, message: dict):
-        message["timestamp"] = datetime.utcnow().isoformat()
-        for connections in self.active_connections.values():
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except:
-                    continue
+        """Publish a message for every connection on every worker."""
+        await self._ensure_started()
+        await self.pubsub.publish(BROADCAST_CHANNEL, self._serialize(message))
+
+    async def broadcast_to_authenticated(self, message: dict):
+        """Publish a message for every signed-in user.
+
+        Sockets are only registered after their token has been verified, so this
+        reaches every managed connection.
+        """
+        await self.broadcast(message)
+
+    async def close(self):
+        """Stop listening for published messages."""
+        if self.started:
+            await self.pubsub.close()
+            self.started = False
+
+    async def _ensure_started(self):
+        """Start receiving published messages on first use."""
+        if self.started:
+            return
+        # Created here so the lock binds to the running event loop
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            # Concurrent first callers wait for one start instead of racing past it
+            if not self.started:
+                await self.pubsub.start(self._deliver)
+                self.started = True
+
+    async def _unsubscribe_if_idle(self, user_id: str):
+        """Drop a user's channel unless they reconnected in the meantime."""
+        if user_id not in self.active_connections:
+            await self.pubsub.unsubscribe(user_channel(user_id))
+
+    def _deliver(self, channel: str, text: str):
+        """Hand a published message to the sockets on this worker it is meant for."""
+        if channel == BROADCAST_CHANNEL:
+            self._fan_out(text, self._all_connections())
+            return
+
+        user_id = channel.split(":", 1)[1]
+        connections = self.active_connections.get(user_id)
+        if connections:
+            self._fan_out(text, list(connections.values()))
+
+    def _serialize(self, message: dict) -> str:
+        """Stamp and encode a message once for all of its recipients."""
+        return json.dumps(
+            {**message, "timestamp": datetime.utcnow().isoformat()},
+            default=str
+        )
+
+    def _all_connections(self) -> Iterable[Connection]:
+        return [
+            connection
+            for connections in self.active_connections.values()
+            for connection in connections.values()
+        ]
+
+    def _fan_out(self, text: str, connections: Iterable[Connection]):
+        """Enqueue without waiting on any socket; drop clients whose queue is full."""
+        for connection in connections:
+            if not connection.enqueue(text):
+                logger.warning(f"Dropping slow websocket consumer for user {connection.user_id}")
+                self.disconnect(connection.websocket, connection.user_id)
+                self._spawn(self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _drain(self, connection: Connection):
+        """Send queued messages to one socket until it fails or is disconnected."""
+        try:
+            while True:
+                text = await connection.queue.get()
+                await connection.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Handle disconnected clients
+            self.disconnect(connection.websocket, connection.user_id)
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Websocket background task failed: {str(task.exception())}")
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
 
 manager = ConnectionManager()